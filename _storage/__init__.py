@@ -1,2 +1,5 @@
-from .kv_redis import RedisKVStorage
-from .vdb_chroma import ChromaVectorStorage
+from .gdb_neo4j import BatchedNeo4jStorage
+from .kv_redis import RedisHashKVStorage, RedisKVStorage
+from .vdb_chroma import ChromaVectorStorage, attempt_collection_names, shared_collection_name
+from .vdb_hnsw import HNSWVectorStorage
+from .vdb_quantized import QuantizedVectorStorage
@@ -0,0 +1,90 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+JSON = 0x01
+JSON_ZSTD = 0x02
+MSGPACK = 0x03
+MSGPACK_ZSTD = 0x04
+
+_COMPRESSED = {JSON_ZSTD: JSON, MSGPACK_ZSTD: MSGPACK}
+
+
+def _json_dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value).encode("utf-8")
+
+
+def _json_loads(raw: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class KVCodec:
+    def __init__(
+        self, format: str = "json", compress_min_bytes: int = 4096, level: int = 3
+    ) -> None:
+        if format == "msgpack" and msgpack is None:
+            format = "json"
+        self.format = format
+        self._marker = MSGPACK if format == "msgpack" else JSON
+        self._compress_min_bytes = compress_min_bytes
+        self._compressor = None
+        self._decompressor = None
+        if zstandard is not None:
+            self._compressor = zstandard.ZstdCompressor(level=level)
+            self._decompressor = zstandard.ZstdDecompressor()
+
+    def encode(self, value: Any) -> bytes:
+        if self._marker == MSGPACK:
+            payload = msgpack.packb(value, use_bin_type=True)
+        else:
+            payload = _json_dumps(value)
+        if (
+            self._compressor is not None
+            and self._compress_min_bytes > 0
+            and len(payload) >= self._compress_min_bytes
+        ):
+            compressed = self._compressor.compress(payload)
+            if len(compressed) < len(payload):
+                marker = MSGPACK_ZSTD if self._marker == MSGPACK else JSON_ZSTD
+                return bytes([marker]) + compressed
+        return bytes([self._marker]) + payload
+
+    def decode(self, raw: bytes | str) -> Any:
+        if isinstance(raw, str):
+            raw = raw.encode("utf-8")
+        if not raw:
+            raise ValueError("Empty value")
+        marker, payload = raw[0], raw[1:]
+        if marker in _COMPRESSED:
+            if self._decompressor is None:
+                raise ValueError("zstandard is required to read compressed values")
+            try:
+                payload = self._decompressor.decompress(payload)
+            except zstandard.ZstdError as exc:
+                raise ValueError(f"Corrupt compressed value: {exc}") from exc
+            marker = _COMPRESSED[marker]
+        if marker == JSON:
+            return _json_loads(payload)
+        if marker == MSGPACK:
+            if msgpack is None:
+                raise ValueError("msgpack is required to read msgpack values")
+            return msgpack.unpackb(payload, raw=False)
+        return _json_loads(raw)
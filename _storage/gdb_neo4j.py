@@ -0,0 +1,153 @@
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any
+
+from nano_graphrag._storage import Neo4jStorage
+from nano_graphrag._storage.gdb_neo4j import make_path_idable
+from nano_graphrag._utils import logger
+
+from services.neo4j_client import get_async_neo4j_driver
+
+
+async def _run_write(tx, query: str, rows: list[dict[str, Any]]) -> None:
+    result = await tx.run(query, rows=rows)
+    await result.consume()
+
+
+@dataclass
+class BatchedNeo4jStorage(Neo4jStorage):
+    def __post_init__(self):
+        addon_params = self.global_config["addon_params"]
+        self.neo4j_url = addon_params.get("neo4j_url", None)
+        self.neo4j_auth = addon_params.get("neo4j_auth", None)
+        self.namespace = (
+            f"{make_path_idable(self.global_config['working_dir'])}__{self.namespace}"
+        )
+        if self.neo4j_url is None or self.neo4j_auth is None:
+            raise ValueError("Missing neo4j_url or neo4j_auth in addon_params")
+        self.async_driver = get_async_neo4j_driver(
+            self.neo4j_url,
+            tuple(self.neo4j_auth),
+            int(addon_params.get("neo4j_max_pool_size", 50)),
+        )
+        self._batch_size = max(1, int(addon_params.get("neo4j_write_batch_size", 1000)))
+        self._concurrency = max(1, int(addon_params.get("neo4j_write_concurrency", 1)))
+        self._pending_nodes: dict[tuple[str, str], dict[str, Any]] = {}
+        self._pending_node_ids: set[str] = set()
+        self._pending_edges: dict[tuple[str, str], dict[str, Any]] = {}
+        self._flush_lock = asyncio.Lock()
+        logger.info(f"Using the label {self.namespace} for Neo4j as identifier")
+
+    async def _write(self, query: str, rows: list[dict[str, Any]]) -> None:
+        in_flight = asyncio.Semaphore(self._concurrency)
+
+        async def _write_batch(batch: list[dict[str, Any]]) -> None:
+            async with in_flight, self.async_driver.session() as session:
+                await session.execute_write(_run_write, query, batch)
+
+        await asyncio.gather(
+            *[
+                _write_batch(rows[i : i + self._batch_size])
+                for i in range(0, len(rows), self._batch_size)
+            ]
+        )
+
+    async def _flush(self) -> None:
+        async with self._flush_lock:
+            nodes, self._pending_nodes = self._pending_nodes, {}
+            edges, self._pending_edges = self._pending_edges, {}
+            self._pending_node_ids = set()
+            by_type: dict[str, list[dict[str, Any]]] = defaultdict(list)
+            for (node_type, node_id), data in nodes.items():
+                by_type[node_type].append({"id": node_id, "data": data})
+            for node_type, rows in by_type.items():
+                await self._write(
+                    f"UNWIND $rows AS row "
+                    f"MERGE (n:{self.namespace}:{node_type} {{id: row.id}}) "
+                    "SET n += row.data",
+                    rows,
+                )
+            if edges:
+                await self._write(
+                    "UNWIND $rows AS row "
+                    f"MATCH (s:{self.namespace} {{id: row.source}}) "
+                    f"MATCH (t:{self.namespace} {{id: row.target}}) "
+                    "MERGE (s)-[r:RELATED]->(t) "
+                    "SET r += row.data",
+                    [
+                        {"source": source, "target": target, "data": data}
+                        for (source, target), data in edges.items()
+                    ],
+                )
+
+    async def _flush_if_full(self) -> None:
+        if len(self._pending_nodes) + len(self._pending_edges) >= (
+            self._batch_size * self._concurrency
+        ):
+            await self._flush()
+
+    async def _flush_if_pending(self, *node_ids: str) -> None:
+        if self._flush_lock.locked() or self._pending_node_ids.intersection(node_ids):
+            await self._flush()
+
+    async def upsert_node(self, node_id: str, node_data: dict[str, str]):
+        node_type = node_data.get("entity_type", "UNKNOWN").strip('"')
+        key = (node_type, node_id)
+        self._pending_nodes[key] = {**self._pending_nodes.get(key, {}), **node_data}
+        self._pending_node_ids.add(node_id)
+        await self._flush_if_full()
+
+    async def upsert_edge(
+        self, source_node_id: str, target_node_id: str, edge_data: dict[str, str]
+    ):
+        edge_data.setdefault("weight", 0.0)
+        key = (source_node_id, target_node_id)
+        self._pending_edges[key] = {**self._pending_edges.get(key, {}), **edge_data}
+        await self._flush_if_full()
+
+    async def has_node(self, node_id: str) -> bool:
+        await self._flush_if_pending(node_id)
+        return await super().has_node(node_id)
+
+    async def get_node(self, node_id: str):
+        await self._flush_if_pending(node_id)
+        return await super().get_node(node_id)
+
+    async def has_edge(self, source_node_id: str, target_node_id: str) -> bool:
+        if (source_node_id, target_node_id) in self._pending_edges:
+            await self._flush()
+        await self._flush_if_pending(source_node_id, target_node_id)
+        return await super().has_edge(source_node_id, target_node_id)
+
+    async def get_edge(self, source_node_id: str, target_node_id: str):
+        if (source_node_id, target_node_id) in self._pending_edges:
+            await self._flush()
+        await self._flush_if_pending(source_node_id, target_node_id)
+        return await super().get_edge(source_node_id, target_node_id)
+
+    async def node_degree(self, node_id: str) -> int:
+        await self._flush()
+        return await super().node_degree(node_id)
+
+    async def edge_degree(self, src_id: str, tgt_id: str) -> int:
+        await self._flush()
+        return await super().edge_degree(src_id, tgt_id)
+
+    async def get_node_edges(self, source_node_id: str):
+        await self._flush()
+        return await super().get_node_edges(source_node_id)
+
+    async def clustering(self, algorithm: str):
+        await self._flush()
+        return await super().clustering(algorithm)
+
+    async def community_schema(self):
+        await self._flush()
+        return await super().community_schema()
+
+    async def index_done_callback(self):
+        await self._flush()
+
+    async def close(self) -> None:
+        await self._flush()
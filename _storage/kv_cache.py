@@ -0,0 +1,111 @@
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+from typing import Any
+
+_WRITE_LOG_MAX = 4096
+
+
+class KVReadCache:
+    def __init__(self) -> None:
+        self._limits: dict[str, int] = {}
+        self._entries: dict[str, OrderedDict[tuple[str, str], tuple[int, Any]]] = {}
+        self._versions: dict[str, int] = {}
+        # Last write epoch per key, so reads that raced a write don't cache the old value.
+        self._epoch = 0
+        self._writes: OrderedDict[tuple[str, str, str], int] = OrderedDict()
+        self._writes_floor = 0
+        self._lock = Lock()
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+
+    def configure(self, limits: dict[str, int]) -> None:
+        with self._lock:
+            for namespace, max_items in limits.items():
+                self._limits[namespace] = max(0, int(max_items))
+                self._entries.setdefault(namespace, OrderedDict())
+
+    def enabled(self, namespace: str) -> bool:
+        return self._limits.get(namespace, 0) > 0
+
+    def version(self, attempt_id: str) -> tuple[int, int]:
+        with self._lock:
+            return self._versions.get(attempt_id, 0), self._epoch
+
+    def get_many(self, attempt_id: str, namespace: str, keys: list[str]) -> dict[str, Any]:
+        found: dict[str, Any] = {}
+        with self._lock:
+            entries = self._entries.get(namespace)
+            if entries is None:
+                return found
+            version = self._versions.get(attempt_id, 0)
+            for key in keys:
+                entry = entries.get((attempt_id, key))
+                if entry is None:
+                    continue
+                if entry[0] != version:
+                    entries.pop((attempt_id, key), None)
+                    continue
+                entries.move_to_end((attempt_id, key))
+                found[key] = entry[1]
+            self.hits[namespace] = self.hits.get(namespace, 0) + len(found)
+            self.misses[namespace] = self.misses.get(namespace, 0) + len(set(keys)) - len(found)
+        return found
+
+    def put_many(
+        self, attempt_id: str, namespace: str, version: tuple[int, int], items: dict[str, Any]
+    ) -> None:
+        attempt_version, epoch = version
+        with self._lock:
+            entries = self._entries.get(namespace)
+            if entries is None or self._versions.get(attempt_id, 0) != attempt_version:
+                return
+            if epoch < self._writes_floor:
+                return
+            for key, value in items.items():
+                if self._writes.get((namespace, attempt_id, key), -1) > epoch:
+                    continue
+                entries[(attempt_id, key)] = (attempt_version, value)
+                entries.move_to_end((attempt_id, key))
+            while len(entries) > self._limits[namespace]:
+                entries.popitem(last=False)
+
+    def discard(self, attempt_id: str, namespace: str, keys: list[str]) -> None:
+        with self._lock:
+            entries = self._entries.get(namespace)
+            if entries is None:
+                return
+            self._epoch += 1
+            for key in keys:
+                entries.pop((attempt_id, key), None)
+                self._writes[(namespace, attempt_id, key)] = self._epoch
+                self._writes.move_to_end((namespace, attempt_id, key))
+            while len(self._writes) > _WRITE_LOG_MAX:
+                _, self._writes_floor = self._writes.popitem(last=False)
+
+    def invalidate(self, attempt_id: str) -> None:
+        with self._lock:
+            self._versions[attempt_id] = self._versions.get(attempt_id, 0) + 1
+            for entries in self._entries.values():
+                for key in [key for key in entries if key[0] == attempt_id]:
+                    del entries[key]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats = {}
+            for namespace, entries in self._entries.items():
+                hits = self.hits.get(namespace, 0)
+                total = hits + self.misses.get(namespace, 0)
+                stats[namespace] = {
+                    "size": len(entries),
+                    "max_size": self._limits[namespace],
+                    "hits": hits,
+                    "misses": self.misses.get(namespace, 0),
+                    "hit_rate": (hits / total) if total else 0.0,
+                }
+            return stats
+
+
+@lru_cache
+def get_kv_read_cache() -> KVReadCache:
+    return KVReadCache()
@@ -1,11 +1,16 @@
-import json
 from dataclasses import dataclass
 from typing import Any
 
-import redis
 from nano_graphrag.base import BaseKVStorage
 from nano_graphrag._utils import logger
 
+from _storage.codec import KVCodec
+from _storage.kv_cache import get_kv_read_cache
+from services.redis_client import aunlink_tracked_keys, get_async_redis
+
+_PIPELINE_MAX_KEYS = 500
+_PIPELINE_MAX_BYTES = 1 << 20
+
 
 @dataclass
 class RedisKVStorage(BaseKVStorage[Any]):
@@ -15,11 +20,35 @@ class RedisKVStorage(BaseKVStorage[Any]):
         self._attempt_id = addon_params.get("attempt_id")
         if not self._redis_url or not self._attempt_id:
             raise ValueError("Missing redis_url or attempt_id in addon_params")
-        self._client = redis.Redis.from_url(self._redis_url, decode_responses=True)
+        self._max_connections = addon_params.get("redis_max_connections")
+        self._codec = KVCodec(
+            addon_params.get("kv_codec", "json"),
+            compress_min_bytes=int(addon_params.get("kv_compress_min_bytes", 4096)),
+        )
         self._prefix = f"kv:{self._attempt_id}:{self.namespace}:"
         self._keys_set = f"kv:{self._attempt_id}:__keys"
+        self._read_cache = get_kv_read_cache()
+        self._read_cache.configure(addon_params.get("kv_read_cache", {}))
         logger.info(f"RedisKVStorage initialized for namespace {self.namespace}")
 
+    @property
+    def _client(self):
+        return get_async_redis(self._redis_url, max_connections=self._max_connections)
+
+    @property
+    def _raw_client(self):
+        return get_async_redis(
+            self._redis_url, decode_responses=False, max_connections=self._max_connections
+        )
+
+    def _decode(self, raw: bytes | None) -> Any:
+        if raw is None:
+            return None
+        try:
+            return self._codec.decode(raw)
+        except ValueError:
+            return None
+
     def _full_key(self, key: str) -> str:
         return f"{self._prefix}{key}"
 
@@ -29,33 +58,40 @@ class RedisKVStorage(BaseKVStorage[Any]):
         return full_key
 
     async def all_keys(self) -> list[str]:
-        keys = self._client.smembers(self._keys_set)
+        keys = await self._client.smembers(self._keys_set)
         return [self._strip_prefix(k) for k in keys if k.startswith(self._prefix)]
 
+    async def _fetch(self, ids: list[str]) -> list[bytes | None]:
+        raws: list[bytes | None] = []
+        for i in range(0, len(ids), _PIPELINE_MAX_KEYS):
+            batch = ids[i : i + _PIPELINE_MAX_KEYS]
+            raws.extend(await self._raw_client.mget([self._full_key(k) for k in batch]))
+        return raws
+
+    async def _load(self, ids: list[str]) -> list[Any | None]:
+        if not self._read_cache.enabled(self.namespace):
+            return [self._decode(raw) for raw in await self._fetch(ids)]
+        version = self._read_cache.version(self._attempt_id)
+        found = self._read_cache.get_many(self._attempt_id, self.namespace, ids)
+        missing = list(dict.fromkeys(i for i in ids if i not in found))
+        if missing:
+            loaded = {
+                key: item
+                for key, item in zip(missing, map(self._decode, await self._fetch(missing)))
+                if item is not None
+            }
+            self._read_cache.put_many(self._attempt_id, self.namespace, version, loaded)
+            found.update(loaded)
+        return [found.get(i) for i in ids]
+
     async def get_by_id(self, id: str):
-        raw = self._client.get(self._full_key(id))
-        if raw is None:
-            return None
-        try:
-            return json.loads(raw)
-        except json.JSONDecodeError:
-            return None
+        return (await self._load([id]))[0]
 
     async def get_by_ids(self, ids: list[str], fields: set[str] | None = None):
         if not ids:
             return []
-        full_keys = [self._full_key(i) for i in ids]
-        raws = self._client.mget(full_keys)
         results: list[Any | None] = []
-        for raw in raws:
-            if raw is None:
-                results.append(None)
-                continue
-            try:
-                item = json.loads(raw)
-            except json.JSONDecodeError:
-                results.append(None)
-                continue
+        for item in await self._load(ids):
             if fields is None or item is None:
                 results.append(item)
             else:
@@ -65,30 +101,102 @@ class RedisKVStorage(BaseKVStorage[Any]):
     async def filter_keys(self, data: list[str]) -> set[str]:
         if not data:
             return set()
-        pipe = self._client.pipeline()
-        for key in data:
-            pipe.exists(self._full_key(key))
-        exists_flags = pipe.execute()
-        return {key for key, exists in zip(data, exists_flags) if exists == 0}
+        missing: set[str] = set()
+        for i in range(0, len(data), _PIPELINE_MAX_KEYS):
+            batch = data[i : i + _PIPELINE_MAX_KEYS]
+            pipe = self._client.pipeline(transaction=False)
+            for key in batch:
+                pipe.exists(self._full_key(key))
+            exists_flags = await pipe.execute()
+            missing.update(key for key, exists in zip(batch, exists_flags) if exists == 0)
+        return missing
 
     async def upsert(self, data: dict[str, Any]):
         if not data:
             return
-        pipe = self._client.pipeline()
+        keys: list[str] = []
+        batch: list[tuple[str, bytes]] = []
+        size = 0
         for key, value in data.items():
-            full_key = self._full_key(key)
-            pipe.set(full_key, json.dumps(value))
-            pipe.sadd(self._keys_set, full_key)
-        pipe.execute()
+            payload = self._codec.encode(value)
+            keys.append(key)
+            batch.append((self._full_key(key), payload))
+            size += len(payload)
+            if len(batch) >= _PIPELINE_MAX_KEYS or size >= _PIPELINE_MAX_BYTES:
+                await self._flush(keys, batch)
+                keys, batch, size = [], [], 0
+        if batch:
+            await self._flush(keys, batch)
+
+    async def _flush(self, keys: list[str], batch: list[tuple[str, bytes]]) -> None:
+        # Invalidate after the write so a concurrent read cannot re-cache the old value.
+        try:
+            await self._write(batch)
+        finally:
+            self._read_cache.discard(self._attempt_id, self.namespace, keys)
+
+    async def _write(self, batch: list[tuple[str, bytes]]) -> None:
+        pipe = self._raw_client.pipeline(transaction=False)
+        for full_key, payload in batch:
+            pipe.set(full_key, payload)
+        pipe.sadd(self._keys_set, *[full_key for full_key, _ in batch])
+        await pipe.execute()
 
     async def drop(self):
-        keys = self._client.smembers(self._keys_set)
-        if not keys:
-            return
-        namespace_keys = [k for k in keys if k.startswith(self._prefix)]
-        if namespace_keys:
-            self._client.delete(*namespace_keys)
-            self._client.srem(self._keys_set, *namespace_keys)
+        self._read_cache.invalidate(self._attempt_id)
+        await aunlink_tracked_keys(self._client, self._keys_set, prefix=self._prefix)
 
     async def index_done_callback(self):
         return
+
+    async def close(self):
+        return
+
+
+@dataclass
+class RedisHashKVStorage(RedisKVStorage):
+    def __post_init__(self):
+        super().__post_init__()
+        self._hash_key = f"kv:{self._attempt_id}:{self.namespace}"
+
+    async def all_keys(self) -> list[str]:
+        return [
+            field.decode("utf-8")
+            async for field, _ in self._raw_client.hscan_iter(self._hash_key, count=1000)
+        ]
+
+    async def _fetch(self, ids: list[str]) -> list[bytes | None]:
+        raws: list[bytes | None] = []
+        for i in range(0, len(ids), _PIPELINE_MAX_KEYS):
+            batch = ids[i : i + _PIPELINE_MAX_KEYS]
+            raws.extend(await self._raw_client.hmget(self._hash_key, batch))
+        return raws
+
+    async def filter_keys(self, data: list[str]) -> set[str]:
+        if not data:
+            return set()
+        missing: set[str] = set()
+        for i in range(0, len(data), _PIPELINE_MAX_KEYS):
+            batch = data[i : i + _PIPELINE_MAX_KEYS]
+            pipe = self._client.pipeline(transaction=False)
+            for key in batch:
+                pipe.hexists(self._hash_key, key)
+            exists_flags = await pipe.execute()
+            missing.update(key for key, exists in zip(batch, exists_flags) if not exists)
+        return missing
+
+    async def _write(self, batch: list[tuple[str, bytes]]) -> None:
+        pipe = self._raw_client.pipeline(transaction=False)
+        pipe.hset(self._hash_key, mapping=dict(batch))
+        pipe.sadd(self._keys_set, self._hash_key)
+        await pipe.execute()
+
+    def _full_key(self, key: str) -> str:
+        return key
+
+    async def drop(self):
+        self._read_cache.invalidate(self._attempt_id)
+        pipe = self._client.pipeline(transaction=False)
+        pipe.unlink(self._hash_key)
+        pipe.srem(self._keys_set, self._hash_key)
+        await pipe.execute()
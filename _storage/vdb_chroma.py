@@ -1,11 +1,64 @@
 import asyncio
+import hashlib
+import re
+import weakref
 from dataclasses import dataclass
 from typing import Any
 
 import chromadb
 import numpy as np
 from nano_graphrag.base import BaseVectorStorage
-from nano_graphrag._utils import logger
+from nano_graphrag._utils import encode_string_by_tiktoken, logger
+
+_MAX_EMBEDDING_INPUTS = 2048
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple, asyncio.Task]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def _connect(host: str, port: int) -> tuple[Any, int]:
+    client = await chromadb.AsyncHttpClient(host=host, port=port)
+    return client, await client.get_max_batch_size()
+
+
+def _shared_client(host: str, port: int) -> "asyncio.Task[tuple[Any, int]]":
+    tasks = _clients.setdefault(asyncio.get_running_loop(), {})
+    task = tasks.get((host, port))
+    if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+        task = tasks[(host, port)] = asyncio.ensure_future(_connect(host, port))
+    return task
+
+
+def shared_collection_name(
+    prefix: str, model: str, namespace: str, attempt_id: str, shards: int
+) -> str:
+    shard = int(hashlib.sha1(attempt_id.encode("utf-8")).hexdigest(), 16) % max(1, shards)
+    return f"{prefix}__{re.sub(r'[^a-zA-Z0-9_-]', '-', model)}__{namespace}__{shard:02d}"
+
+
+def attempt_collection_names(attempt_id: str, layout: str, model: str, shards: int) -> list[str]:
+    if layout == "shared":
+        return [
+            shared_collection_name("col", model, namespace, attempt_id, shards)
+            for namespace in ("entities", "chunks")
+        ]
+    return [f"col__{attempt_id}__entities", f"col__{attempt_id}__chunks"]
+
+
+def token_batches(data: dict[str, dict], max_tokens: int) -> list[list[str]]:
+    batches: list[list[str]] = [[]]
+    batch_tokens = 0
+    for key in data:
+        tokens = len(encode_string_by_tiktoken(data[key]["content"]))
+        if batches[-1] and (
+            batch_tokens + tokens > max_tokens or len(batches[-1]) >= _MAX_EMBEDDING_INPUTS
+        ):
+            batches.append([])
+            batch_tokens = 0
+        batches[-1].append(key)
+        batch_tokens += tokens
+    return batches
 
 
 @dataclass
@@ -18,66 +71,111 @@ class ChromaVectorStorage(BaseVectorStorage):
         self._collection_prefix = addon_params.get("chroma_collection_prefix", "col")
         if not self._chroma_host or not self._chroma_port or not self._attempt_id:
             raise ValueError("Missing chroma_host, chroma_port, or attempt_id in addon_params")
-        self._client = chromadb.HttpClient(host=self._chroma_host, port=self._chroma_port)
-        self._collection_name = f"{self._collection_prefix}__{self._attempt_id}__{self.namespace}"
-        try:
-            self._collection = self._client.get_collection(self._collection_name)
-        except Exception:
-            self._collection = self._client.create_collection(self._collection_name)
-        self._max_batch_size = int(self.global_config.get("embedding_batch_num", 32))
+        self._shared = addon_params.get("chroma_layout", "per_attempt") == "shared"
+        if self._shared:
+            self._collection_name = shared_collection_name(
+                self._collection_prefix,
+                addon_params.get("embedding_model", "default"),
+                self.namespace,
+                self._attempt_id,
+                int(addon_params.get("chroma_shards", 4)),
+            )
+            self._where = {"attempt_id": self._attempt_id}
+            self._id_prefix = f"{self._attempt_id}:"
+        else:
+            self._collection_name = (
+                f"{self._collection_prefix}__{self._attempt_id}__{self.namespace}"
+            )
+            self._where = None
+            self._id_prefix = ""
+        self._client = None
+        self._max_batch_size = 0
+        self._collection = None
+        self._collection_lock = asyncio.Lock()
+        self._batch_max_tokens = int(addon_params.get("embedding_batch_max_tokens", 60_000))
+        self._pipeline_depth = max(1, int(addon_params.get("embedding_pipeline_depth", 4)))
         logger.info(f"ChromaVectorStorage using collection {self._collection_name}")
 
+    async def _get_collection(self):
+        if self._collection is not None:
+            return self._collection
+        async with self._collection_lock:
+            if self._collection is None:
+                self._client, self._max_batch_size = await _shared_client(
+                    self._chroma_host, self._chroma_port
+                )
+                self._collection = await self._client.get_or_create_collection(
+                    self._collection_name
+                )
+        return self._collection
+
     async def upsert(self, data: dict[str, dict]):
         if not data:
             logger.warning("No vectors to upsert")
             return []
         ids = list(data.keys())
-        documents = [data[k]["content"] for k in ids]
-        metadatas: list[dict[str, Any]] = []
-        for k in ids:
-            meta = {field: data[k].get(field) for field in self.meta_fields}
-            metadatas.append(meta)
-
-        batches = [
-            documents[i : i + self._max_batch_size]
-            for i in range(0, len(documents), self._max_batch_size)
-        ]
-        embeddings_list = await asyncio.gather(
-            *[self.embedding_func(batch) for batch in batches]
-        )
-        embeddings = np.concatenate(embeddings_list)
-        embeddings = embeddings.tolist()
-
-        self._collection.upsert(
-            ids=ids,
-            documents=documents,
-            metadatas=metadatas,
-            embeddings=embeddings,
-        )
+        batches = token_batches(data, self._batch_max_tokens)
+
+        collection = await self._get_collection()
+        max_write = self._max_batch_size
+        in_flight = asyncio.Semaphore(self._pipeline_depth)
+
+        async def _embed_and_write(batch: list[str]) -> None:
+            async with in_flight:
+                documents = [data[k]["content"] for k in batch]
+                metadatas = [{f: data[k].get(f) for f in self.meta_fields} for k in batch]
+                if self._shared:
+                    for meta in metadatas:
+                        meta["attempt_id"] = self._attempt_id
+                chroma_ids = [f"{self._id_prefix}{k}" for k in batch]
+                embeddings = np.asarray(await self.embedding_func(documents), dtype=np.float32)
+                for i in range(0, len(batch), max_write):
+                    await collection.upsert(
+                        ids=chroma_ids[i : i + max_write],
+                        documents=documents[i : i + max_write],
+                        metadatas=metadatas[i : i + max_write],
+                        embeddings=embeddings[i : i + max_write],
+                    )
+
+        await asyncio.gather(*[_embed_and_write(batch) for batch in batches])
         return ids
 
     async def query(self, query: str, top_k: int = 5):
-        embedding = await self.embedding_func([query])
-        if isinstance(embedding, np.ndarray):
-            query_vector = embedding[0].tolist()
-        else:
-            query_vector = embedding[0]
-        results = self._collection.query(
-            query_embeddings=[query_vector],
+        return (await self.query_many([query], top_k))[0]
+
+    async def query_many(
+        self,
+        queries: list[str],
+        top_k: int = 5,
+        embeddings: np.ndarray | None = None,
+    ) -> list[list[dict[str, Any]]]:
+        if not queries:
+            return []
+        if embeddings is None:
+            embeddings = await self.embedding_func(queries)
+        collection = await self._get_collection()
+        results = await collection.query(
+            query_embeddings=np.asarray(embeddings, dtype=np.float32),
             n_results=top_k,
-            include=["metadatas", "distances", "documents", "ids"],
+            where=self._where,
+            include=["metadatas", "distances", "documents"],
         )
-        ids = results.get("ids", [[]])[0]
-        metas = results.get("metadatas", [[]])[0]
-        distances = results.get("distances", [[]])[0]
-
-        output: list[dict[str, Any]] = []
-        for idx, meta, dist in zip(ids, metas, distances):
-            entry = {"id": idx, "distance": float(dist)}
-            if meta:
-                entry.update(meta)
-            output.append(entry)
-        return output
+        all_ids = results.get("ids") or [[] for _ in queries]
+        all_metas = results.get("metadatas") or [[] for _ in queries]
+        all_distances = results.get("distances") or [[] for _ in queries]
+
+        outputs: list[list[dict[str, Any]]] = []
+        for ids, metas, distances in zip(all_ids, all_metas, all_distances):
+            output: list[dict[str, Any]] = []
+            for idx, meta, dist in zip(ids, metas, distances):
+                entry = {"id": idx[len(self._id_prefix) :], "distance": float(dist)}
+                if meta:
+                    entry.update(meta)
+                if self._shared:
+                    entry.pop("attempt_id", None)
+                output.append(entry)
+            outputs.append(output)
+        return outputs
 
     async def index_done_callback(self):
         return
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import hnswlib
+import numpy as np
+from nano_graphrag.base import BaseVectorStorage
+from nano_graphrag._utils import logger
+
+from .vdb_chroma import token_batches
+
+_HNSW_M = 16
+_HNSW_EF_CONSTRUCTION = 200
+_HNSW_EF_SEARCH = 64
+_MIN_CAPACITY = 1024
+
+
+@dataclass
+class HNSWVectorStorage(BaseVectorStorage):
+    def __post_init__(self):
+        addon_params = self.global_config.get("addon_params", {})
+        self._dir = Path(self.global_config["working_dir"]) / "vectors" / self.namespace
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._index_path = self._dir / "index.bin"
+        self._vectors_path = self._dir / "vectors.f32"
+        self._rows_path = self._dir / "rows.json"
+        self._dim = self.embedding_func.embedding_dim
+        self._batch_max_tokens = int(addon_params.get("embedding_batch_max_tokens", 60_000))
+        self._pipeline_depth = max(1, int(addon_params.get("embedding_pipeline_depth", 4)))
+        self._ids: list[str] = []
+        self._metas: list[dict[str, Any]] = []
+        self._rows: dict[str, int] = {}
+        self._vectors = np.zeros((0, self._dim), dtype=np.float32)
+        self._index: hnswlib.Index | None = None
+        self._loaded = False
+        self._dirty = False
+        self._load_lock = asyncio.Lock()
+
+    async def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if not self._loaded:
+                await asyncio.to_thread(self._load)
+                self._loaded = True
+                logger.info(f"HNSWVectorStorage using {self._dir} ({len(self._ids)} vectors)")
+
+    def _new_index(self, capacity: int) -> hnswlib.Index:
+        index = hnswlib.Index(space="l2", dim=self._dim)
+        index.init_index(
+            max_elements=max(capacity, _MIN_CAPACITY),
+            ef_construction=_HNSW_EF_CONSTRUCTION,
+            M=_HNSW_M,
+        )
+        index.set_ef(_HNSW_EF_SEARCH)
+        return index
+
+    def _load_rows(self) -> bool:
+        if not self._rows_path.exists():
+            return False
+        rows = json.loads(self._rows_path.read_text(encoding="utf-8"))
+        self._ids = [row["id"] for row in rows]
+        self._metas = [row["meta"] for row in rows]
+        self._rows = {key: i for i, key in enumerate(self._ids)}
+        return bool(self._ids)
+
+    def _load(self) -> None:
+        if not self._load_rows():
+            return
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r", shape=(len(self._ids), self._dim)
+        )
+        if self._index_path.exists():
+            self._index = hnswlib.Index(space="l2", dim=self._dim)
+            self._index.load_index(str(self._index_path), max_elements=len(self._ids))
+            self._index.set_ef(_HNSW_EF_SEARCH)
+        else:
+            self._index = self._new_index(len(self._ids))
+            self._index.add_items(self._vectors, np.arange(len(self._ids)))
+
+    def _filled(self) -> np.ndarray:
+        return self._vectors[: len(self._ids)]
+
+    def _apply(self, keys: list[str], metas: list[dict], embeddings: np.ndarray) -> None:
+        filled = len(self._ids)
+        for key in keys:
+            if key not in self._rows:
+                self._rows[key] = len(self._ids)
+                self._ids.append(key)
+                self._metas.append({})
+        if len(self._ids) > len(self._vectors) or isinstance(self._vectors, np.memmap):
+            capacity = len(self._vectors)
+            if len(self._ids) > capacity:
+                capacity = max(len(self._ids), 2 * capacity, _MIN_CAPACITY)
+            matrix = np.empty((capacity, self._dim), dtype=np.float32)
+            matrix[:filled] = self._vectors[:filled]
+            self._vectors = matrix
+        labels = np.array([self._rows[key] for key in keys])
+        self._vectors[labels] = embeddings
+        for label, meta in zip(labels, metas):
+            self._metas[label] = meta
+        self._index_add(embeddings, labels)
+        self._dirty = True
+
+    def _index_add(self, embeddings: np.ndarray, labels: np.ndarray) -> None:
+        if self._index is None:
+            self._index = self._new_index(len(self._ids))
+        elif len(self._ids) > self._index.get_max_elements():
+            self._index.resize_index(max(len(self._ids), 2 * self._index.get_max_elements()))
+        self._index.add_items(embeddings, labels)
+
+    def _search(self, embeddings: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        self._index.set_ef(max(_HNSW_EF_SEARCH, k))
+        return self._index.knn_query(embeddings, k=k)
+
+    async def _asearch(self, embeddings: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        return self._search(embeddings, k)
+
+    async def upsert(self, data: dict[str, dict]):
+        if not data:
+            logger.warning("No vectors to upsert")
+            return []
+        await self._ensure_loaded()
+        in_flight = asyncio.Semaphore(self._pipeline_depth)
+
+        async def _embed_and_apply(batch: list[str]) -> None:
+            async with in_flight:
+                embeddings = np.asarray(
+                    await self.embedding_func([data[k]["content"] for k in batch]),
+                    dtype=np.float32,
+                )
+            metas = [{f: data[k].get(f) for f in self.meta_fields} for k in batch]
+            self._apply(batch, metas, embeddings)
+
+        await asyncio.gather(
+            *[_embed_and_apply(batch) for batch in token_batches(data, self._batch_max_tokens)]
+        )
+        return list(data.keys())
+
+    async def query(self, query: str, top_k: int = 5):
+        return (await self.query_many([query], top_k))[0]
+
+    async def query_many(
+        self,
+        queries: list[str],
+        top_k: int = 5,
+        embeddings: np.ndarray | None = None,
+    ) -> list[list[dict[str, Any]]]:
+        if not queries:
+            return []
+        await self._ensure_loaded()
+        if not self._ids:
+            return [[] for _ in queries]
+        if embeddings is None:
+            embeddings = await self.embedding_func(queries)
+        labels, distances = await self._asearch(
+            np.asarray(embeddings, dtype=np.float32), min(top_k, len(self._ids))
+        )
+        outputs: list[list[dict[str, Any]]] = []
+        for row_labels, row_distances in zip(labels, distances):
+            output: list[dict[str, Any]] = []
+            for label, dist in zip(row_labels, row_distances):
+                entry = {"id": self._ids[label], "distance": float(dist)}
+                entry.update(self._metas[label])
+                output.append(entry)
+            outputs.append(output)
+        return outputs
+
+    async def index_done_callback(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            await asyncio.to_thread(self._save)
+        except BaseException:
+            self._dirty = True
+            raise
+
+    def _save(self) -> None:
+        index_tmp = self._index_path.with_suffix(".tmp")
+        self._index.save_index(str(index_tmp))
+        os.replace(index_tmp, self._index_path)
+        vectors_tmp = self._vectors_path.with_suffix(".tmp")
+        np.ascontiguousarray(self._filled()).tofile(vectors_tmp)
+        os.replace(vectors_tmp, self._vectors_path)
+        self._save_rows()
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r", shape=(len(self._ids), self._dim)
+        )
+
+    def _save_rows(self) -> None:
+        rows_tmp = self._rows_path.with_suffix(".tmp")
+        rows_tmp.write_text(
+            json.dumps([{"id": key, "meta": meta} for key, meta in zip(self._ids, self._metas)]),
+            encoding="utf-8",
+        )
+        os.replace(rows_tmp, self._rows_path)
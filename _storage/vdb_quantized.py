@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from .vdb_hnsw import HNSWVectorStorage
+
+_DTYPES = {"int8": np.int8, "float16": np.float16}
+_SCAN_BLOCK_ROWS = 4096
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> tuple[np.ndarray, np.ndarray]:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def dequantize(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    return codes.astype(np.float32) * scales[:, None]
+
+
+def scan_l2(
+    queries: np.ndarray,
+    codes: np.ndarray,
+    scales: np.ndarray,
+    norms: np.ndarray,
+    k: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    queries = np.asarray(queries, dtype=np.float32)
+    k = min(k, len(codes))
+    if k <= 0:
+        return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), np.float32)
+    query_norms = (queries * queries).sum(axis=1)[:, None]
+    # Columns [:k] hold the running top-k, [k:] the current block's candidates.
+    best_labels = np.zeros((len(queries), 2 * k), dtype=np.int64)
+    best_distances = np.full((len(queries), 2 * k), np.inf, dtype=np.float32)
+    for start in range(0, len(codes), _SCAN_BLOCK_ROWS):
+        block = codes[start : start + _SCAN_BLOCK_ROWS].astype(np.float32)
+        distances = query_norms - 2 * (queries @ block.T) * scales[start : start + len(block)]
+        distances += norms[start : start + len(block)]
+        top = min(k, len(block))
+        candidates = np.argpartition(distances, top - 1, axis=1)[:, :top]
+        best_distances[:, k : k + top] = np.take_along_axis(distances, candidates, axis=1)
+        best_labels[:, k : k + top] = candidates + start
+        keep = np.argpartition(best_distances[:, : k + top], k - 1, axis=1)[:, :k]
+        best_distances[:, :k] = np.take_along_axis(best_distances, keep, axis=1)
+        best_labels[:, :k] = np.take_along_axis(best_labels, keep, axis=1)
+    order = np.argsort(best_distances[:, :k], axis=1)
+    return (
+        np.take_along_axis(best_labels[:, :k], order, axis=1),
+        np.maximum(np.take_along_axis(best_distances[:, :k], order, axis=1), 0),
+    )
+
+
+@dataclass
+class QuantizedVectorStorage(HNSWVectorStorage):
+    def __post_init__(self):
+        addon_params = self.global_config.get("addon_params", {})
+        self._dtype = addon_params.get("vector_quantization", "int8")
+        self._codes: np.ndarray | None = None
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._norms = np.zeros(0, dtype=np.float32)
+        super().__post_init__()
+
+    def _quantized_paths(self):
+        return self._dir / "codes.bin", self._dir / "scales.f32", self._dir / "norms.f32"
+
+    def _load(self) -> None:
+        meta_path = self._dir / "meta.json"
+        if meta_path.exists():
+            self._dtype = json.loads(meta_path.read_text(encoding="utf-8"))["dtype"]
+        if self._dtype not in _DTYPES:
+            raise ValueError(f"Unsupported vector quantization: {self._dtype}")
+        if not self._load_rows():
+            return
+        codes_path, scales_path, norms_path = self._quantized_paths()
+        self._codes = np.memmap(
+            codes_path, dtype=_DTYPES[self._dtype], mode="r", shape=(len(self._ids), self._dim)
+        )
+        self._scales = np.fromfile(scales_path, dtype=np.float32)
+        self._norms = np.fromfile(norms_path, dtype=np.float32)
+
+    def _apply(self, keys: list[str], metas: list[dict], embeddings: np.ndarray) -> None:
+        if self._codes is not None and not len(self._vectors):
+            self._vectors = dequantize(self._codes, self._scales)
+        super()._apply(keys, metas, embeddings)
+        self._codes = None
+
+    def _index_add(self, embeddings: np.ndarray, labels: np.ndarray) -> None:
+        return
+
+    def _search(self, embeddings: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        if self._codes is None:
+            vectors = np.asarray(self._filled(), dtype=np.float32)
+            return scan_l2(
+                embeddings,
+                vectors,
+                np.ones(len(vectors), dtype=np.float32),
+                (vectors * vectors).sum(axis=1),
+                k,
+            )
+        return scan_l2(embeddings, self._codes, self._scales, self._norms, k)
+
+    async def _asearch(self, embeddings: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        return await asyncio.to_thread(self._search, embeddings, k)
+
+    def _save(self) -> None:
+        codes, scales = quantize(self._filled(), self._dtype)
+        restored = dequantize(codes, scales)
+        norms = (restored * restored).sum(axis=1).astype(np.float32)
+        for path, array in zip(self._quantized_paths(), (codes, scales, norms)):
+            tmp = path.with_suffix(".tmp")
+            array.tofile(tmp)
+            os.replace(tmp, path)
+        (self._dir / "meta.json").write_text(json.dumps({"dtype": self._dtype}), encoding="utf-8")
+        self._save_rows()
+        self._load()
+        self._vectors = np.zeros((0, self._dim), dtype=np.float32)
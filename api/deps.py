@@ -1,12 +1,13 @@
 import hashlib
 from datetime import datetime, timezone
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 
 from db.models import Session as DbSession, User
 from db.session import get_db
+from services.container import ServiceContainer
 
 security = HTTPBearer(auto_error=False)
 
@@ -15,6 +16,10 @@ def hash_token(token: str) -> str:
     return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
 
+def get_services(request: Request) -> ServiceContainer:
+    return request.app.state.services
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db),
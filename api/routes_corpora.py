@@ -1,23 +1,26 @@
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from api.deps import get_current_user
+from api.deps import get_current_user, get_services
 from api.schemas import CorpusCreateRequest, CorpusCreateResponse, CorpusResponse
 from config import get_settings
-from db.models import Corpus, User
+from db.models import Attempt, Corpus, User
 from db.session import SessionLocal, get_db
 from ingestion.build_attempt import build_attempt
 from ingestion.create_corpus import create_corpus as create_corpus_record
 from ingestion.delete_corpus import delete_corpus
+from ingestion.locks import claim_corpus_delete, release_corpus_delete
+from ingestion.storage_fs import append_attempt_log
+from services.container import ServiceContainer
 
 router = APIRouter()
 settings = get_settings()
 
 
-def _run_build_attempt(attempt_id: str) -> None:
+def _run_build_attempt(attempt_id: str, services: ServiceContainer) -> None:
     db = SessionLocal()
     try:
-        build_attempt(db, attempt_id)
+        build_attempt(db, attempt_id, services)
     finally:
         db.close()
 
@@ -28,6 +31,7 @@ def create_corpus(
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    services: ServiceContainer = Depends(get_services),
 ):
     try:
         corpus_id, attempt_id = create_corpus_record(
@@ -40,7 +44,7 @@ def create_corpus(
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    background_tasks.add_task(_run_build_attempt, attempt_id)
+    background_tasks.add_task(_run_build_attempt, attempt_id, services)
     return CorpusCreateResponse(corpus_id=corpus_id, attempt_id=attempt_id)
 
 
@@ -70,11 +74,29 @@ def get_corpus(
     return corpus
 
 
-@router.delete("/{corpus_id}")
+def _run_delete_corpus(corpus_id: str, services: ServiceContainer) -> None:
+    db = SessionLocal()
+    try:
+        delete_corpus(db, corpus_id, services)
+    except Exception as exc:  # noqa: BLE001
+        db.rollback()
+        for attempt in db.query(Attempt).filter(Attempt.corpus_id == corpus_id).all():
+            attempt.status = "delete_failed"
+            attempt.error = str(exc)
+            append_attempt_log(corpus_id, attempt.attempt_id, f"Delete failed: {exc}")
+        db.commit()
+    finally:
+        release_corpus_delete(corpus_id)
+        db.close()
+
+
+@router.delete("/{corpus_id}", status_code=status.HTTP_202_ACCEPTED)
 def delete_corpus_route(
     corpus_id: str,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    services: ServiceContainer = Depends(get_services),
 ):
     corpus = (
         db.query(Corpus)
@@ -85,5 +107,14 @@ def delete_corpus_route(
     if corpus is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Corpus not found")
 
-    delete_corpus(db, corpus_id)
-    return {"ok": True}
+    if claim_corpus_delete(corpus_id):
+        try:
+            for attempt in db.query(Attempt).filter(Attempt.corpus_id == corpus_id).all():
+                attempt.status = "deleting"
+            corpus.latest_success_attempt_id = None
+            db.commit()
+        except Exception:
+            release_corpus_delete(corpus_id)
+            raise
+        background_tasks.add_task(_run_delete_corpus, corpus_id, services)
+    return {"ok": True, "status": "deleting"}
@@ -1,18 +1,15 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from sqlalchemy import text
 
+from api.deps import get_services
 from db.session import SessionLocal
-from services.chroma_client import ChromaClient
-from services.neo4j_client import Neo4jClient
-from services.redis_client import RedisClient
-from config import get_settings
+from services.container import ServiceContainer
 
 router = APIRouter()
-settings = get_settings()
 
 
 @router.get("/health")
-def health_check():
+def health_check(services: ServiceContainer = Depends(get_services)):
     status = {"postgres": False, "neo4j": False, "redis": False, "chroma": False}
 
     try:
@@ -28,22 +25,22 @@ def health_check():
             pass
 
     try:
-        neo = Neo4jClient(settings.NEO4J_URI, settings.NEO4J_USER, settings.NEO4J_PASSWORD)
-        status["neo4j"] = neo.ping()
-        neo.close()
+        status["neo4j"] = services.neo4j.ping()
     except Exception:
         status["neo4j"] = False
 
     try:
-        redis = RedisClient(settings.REDIS_URL)
-        status["redis"] = redis.ping()
+        status["redis"] = services.redis.ping()
     except Exception:
         status["redis"] = False
 
     try:
-        chroma = ChromaClient(settings.CHROMA_HOST, settings.CHROMA_PORT)
-        status["chroma"] = chroma.heartbeat()
+        status["chroma"] = services.chroma.heartbeat()
     except Exception:
         status["chroma"] = False
 
-    return {"ok": all(status.values()), "components": status}
+    return {
+        "ok": all(status.values()),
+        "components": status,
+        "caches": services.stats(),
+    }
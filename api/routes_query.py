@@ -1,13 +1,30 @@
+import json
+from typing import Any
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
 
-from api.deps import get_current_user
-from api.schemas import QueryRequest, QueryResponse, RetrieveResponse
+from api.deps import get_current_user, get_services
+from api.schemas import (
+    BatchQueryRequest,
+    BatchQueryResponse,
+    ContextItem,
+    FederatedQueryRequest,
+    FederatedQueryResponse,
+    QueryRequest,
+    QueryResponse,
+    RetrieveResponse,
+)
+from config import get_settings
 from db.models import Attempt, Corpus, User
 from db.session import get_db
-from runners.registry import get_runner
+from services.container import ServiceContainer
 
 router = APIRouter()
+settings = get_settings()
 
 
 def _get_ready_attempt(
@@ -29,13 +46,9 @@ def _get_ready_attempt(
     return attempt
 
 
-@router.post("/{corpus_id}/query", response_model=QueryResponse)
-def query_corpus(
-    corpus_id: str,
-    request: QueryRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
+def _get_query_target(
+    db: Session, corpus_id: str, current_user: User, attempt_id: str | None
+) -> tuple[Corpus, Attempt]:
     corpus = (
         db.query(Corpus)
         .filter(Corpus.corpus_id == corpus_id)
@@ -44,11 +57,76 @@ def query_corpus(
     )
     if corpus is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Corpus not found")
+    return corpus, _get_ready_attempt(db, corpus, attempt_id)
+
+
+def _get_federated_targets(
+    db: Session, current_user: User, corpus_ids: list[str] | None
+) -> list[tuple[Corpus, Attempt]]:
+    if corpus_ids is None:
+        corpora = (
+            db.query(Corpus)
+            .filter(Corpus.owner_user_id == current_user.id)
+            .filter(Corpus.latest_success_attempt_id.isnot(None))
+            .all()
+        )
+        targets = [(corpus, _get_ready_attempt(db, corpus, None)) for corpus in corpora]
+    else:
+        targets = [
+            _get_query_target(db, corpus_id, current_user, None)
+            for corpus_id in dict.fromkeys(corpus_ids)
+        ]
+    if not targets:
+        raise HTTPException(status_code=400, detail="No ready corpora available")
+    return targets
+
 
-    attempt = _get_ready_attempt(db, corpus, request.attempt_id)
-    runner = get_runner(attempt.runner_type)
+@router.post("/query", response_model=FederatedQueryResponse)
+async def federated_query(
+    request: FederatedQueryRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    services: ServiceContainer = Depends(get_services),
+):
+    targets = await run_in_threadpool(
+        _get_federated_targets, db, current_user, request.corpus_ids
+    )
+    runner_types = {attempt.runner_type for _, attempt in targets}
+    if len(runner_types) > 1:
+        raise HTTPException(status_code=400, detail="Corpora use different runner types")
+    runner = services.runner(runner_types.pop())
+
+    answer, contexts, meta = await runner.retrieve_and_answer_federated(
+        targets=[
+            {
+                "corpus_id": corpus.corpus_id,
+                "attempt_id": attempt.attempt_id,
+                "config": attempt.config,
+            }
+            for corpus, attempt in targets
+        ],
+        question=request.question,
+        top_k=request.top_k,
+        expand_graph=request.expand_graph,
+    )
 
-    contexts = runner.retrieve(
+    return FederatedQueryResponse(answer=answer, contexts=contexts, meta=meta)
+
+
+@router.post("/{corpus_id}/query", response_model=QueryResponse)
+async def query_corpus(
+    corpus_id: str,
+    request: QueryRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    services: ServiceContainer = Depends(get_services),
+):
+    corpus, attempt = await run_in_threadpool(
+        _get_query_target, db, corpus_id, current_user, request.attempt_id
+    )
+    runner = services.runner(attempt.runner_type)
+
+    answer, contexts = await runner.retrieve_and_answer(
         corpus_id=corpus.corpus_id,
         attempt_id=attempt.attempt_id,
         question=request.question,
@@ -56,31 +134,103 @@ def query_corpus(
         expand_graph=request.expand_graph,
         config=attempt.config,
     )
-    answer = runner.answer(request.question, contexts)
 
     return QueryResponse(answer=answer, contexts=contexts)
 
 
-@router.post("/{corpus_id}/retrieve", response_model=RetrieveResponse)
-def retrieve_only(
+@router.post("/{corpus_id}/query:batch", response_model=BatchQueryResponse)
+async def batch_query_corpus(
+    corpus_id: str,
+    request: BatchQueryRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    services: ServiceContainer = Depends(get_services),
+):
+    if len(request.questions) > settings.QUERY_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch exceeds max size {settings.QUERY_BATCH_MAX_QUESTIONS}",
+        )
+    corpus, attempt = await run_in_threadpool(
+        _get_query_target, db, corpus_id, current_user, request.attempt_id
+    )
+    runner = services.runner(attempt.runner_type)
+
+    results = await runner.retrieve_and_answer_batch(
+        corpus_id=corpus.corpus_id,
+        attempt_id=attempt.attempt_id,
+        questions=request.questions,
+        top_k=request.top_k,
+        expand_graph=request.expand_graph,
+        config=attempt.config,
+    )
+
+    return BatchQueryResponse(results=results)
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/{corpus_id}/query:stream")
+async def stream_query_corpus(
     corpus_id: str,
     request: QueryRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    services: ServiceContainer = Depends(get_services),
 ):
-    corpus = (
-        db.query(Corpus)
-        .filter(Corpus.corpus_id == corpus_id)
-        .filter(Corpus.owner_user_id == current_user.id)
-        .first()
+    corpus, attempt = await run_in_threadpool(
+        _get_query_target, db, corpus_id, current_user, request.attempt_id
     )
-    if corpus is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Corpus not found")
+    runner = services.runner(attempt.runner_type)
+
+    contexts, tokens = await runner.retrieve_and_stream_answer(
+        corpus_id=corpus.corpus_id,
+        attempt_id=attempt.attempt_id,
+        question=request.question,
+        top_k=request.top_k,
+        expand_graph=request.expand_graph,
+        config=attempt.config,
+    )
+
+    async def _events():
+        try:
+            items = [ContextItem(**c).model_dump() for c in contexts]
+            yield _sse("contexts", {"contexts": items})
+            try:
+                async for token in tokens:
+                    yield _sse("token", {"text": token})
+            except Exception as exc:
+                yield _sse("error", {"detail": str(exc)})
+                return
+            yield _sse("done", {})
+        finally:
+            await tokens.aclose()
+
+    # The background task also covers disconnects before _events() is first iterated.
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(tokens.aclose),
+    )
+
 
-    attempt = _get_ready_attempt(db, corpus, request.attempt_id)
-    runner = get_runner(attempt.runner_type)
+@router.post("/{corpus_id}/retrieve", response_model=RetrieveResponse)
+async def retrieve_only(
+    corpus_id: str,
+    request: QueryRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    services: ServiceContainer = Depends(get_services),
+):
+    corpus, attempt = await run_in_threadpool(
+        _get_query_target, db, corpus_id, current_user, request.attempt_id
+    )
+    runner = services.runner(attempt.runner_type)
 
-    contexts = runner.retrieve(
+    contexts = await runner.retrieve(
         corpus_id=corpus.corpus_id,
         attempt_id=attempt.attempt_id,
         question=request.question,
@@ -78,5 +78,34 @@ class QueryResponse(BaseModel):
     contexts: list[ContextItem]
 
 
+class FederatedQueryResponse(QueryResponse):
+    meta: dict[str, Any] = Field(default_factory=dict)
+
+
 class RetrieveResponse(BaseModel):
     contexts: list[ContextItem]
+
+
+class BatchQueryRequest(BaseModel):
+    questions: list[str] = Field(min_length=1)
+    attempt_id: Optional[str] = None
+    top_k: int = 5
+    expand_graph: bool = True
+
+
+class BatchQueryItem(BaseModel):
+    question: str
+    answer: Optional[str] = None
+    contexts: list[ContextItem] = Field(default_factory=list)
+    error: Optional[str] = None
+
+
+class BatchQueryResponse(BaseModel):
+    results: list[BatchQueryItem]
+
+
+class FederatedQueryRequest(BaseModel):
+    question: str
+    corpus_ids: Optional[list[str]] = None
+    top_k: int = 5
+    expand_graph: bool = True
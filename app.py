@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from api.routes_auth import router as auth_router
@@ -5,8 +7,21 @@ from api.routes_corpora import router as corpora_router
 from api.routes_attempts import router as attempts_router
 from api.routes_query import router as query_router
 from api.routes_health import router as health_router
+from config import get_settings
+from services.container import ServiceContainer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    services = ServiceContainer(get_settings())
+    app.state.services = services
+    try:
+        yield
+    finally:
+        await services.aclose()
+
 
-app = FastAPI(title="rag-service", version="0.1.0")
+app = FastAPI(title="rag-service", version="0.1.0", lifespan=lifespan)
 
 app.include_router(health_router, tags=["health"])
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
@@ -29,6 +29,49 @@ class Settings(BaseSettings):
     MAX_TEXT_CHARS: int = 2_000_000
     DEFAULT_RUNNER: str = "graph"
 
+    RAG_CACHE_MAX_SIZE: int = 32
+    RAG_CACHE_IDLE_TTL_SECONDS: int = 900
+
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_ITEMS: int = 20000
+    EMBEDDING_CACHE_TTL_SECONDS: int = 604800
+    EMBEDDING_STORE: str = "file"
+
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 1000
+
+    QUERY_BATCH_MAX_QUESTIONS: int = 1000
+    QUERY_BATCH_CONCURRENCY: int = 8
+
+    CONTEXT_TOKEN_BUDGET: int = 6000
+
+    EMBEDDING_MAX_CONCURRENCY: int = 8
+    EMBEDDING_TPM_LIMIT: int = 1_000_000
+    EMBEDDING_BATCH_MAX_TOKENS: int = 60_000
+
+    HYBRID_SEARCH_ENABLED: bool = True
+    LEXICAL_DECISIVE_RATIO: float = 2.0
+
+    OPENAI_MAX_CONNECTIONS: int = 100
+    NEO4J_MAX_POOL_SIZE: int = 50
+    NEO4J_WRITE_BATCH_SIZE: int = 1000
+    NEO4J_WRITE_CONCURRENCY: int = 4
+    NEO4J_DELETE_BATCH_SIZE: int = 10_000
+    REDIS_MAX_CONNECTIONS: int = 64
+    KV_CODEC: str = "json"
+    KV_LAYOUT: str = "keys"
+    VECTOR_BACKEND: str = "chroma"
+    VECTOR_QUANTIZATION: str = "int8"
+    CHROMA_LAYOUT: str = "per_attempt"
+    CHROMA_SHARDS: int = 4
+    KV_READ_CACHE: dict[str, int] = {
+        "text_chunks": 20000,
+        "full_docs": 16,
+        "community_reports": 5000,
+    }
+    KV_COMPRESS_MIN_BYTES: int = 4096
+
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8001
 
@@ -5,10 +5,10 @@ from sqlalchemy.orm import Session
 from db.models import Attempt, Corpus
 from ingestion.locks import attempt_lock
 from ingestion.storage_fs import append_attempt_log
-from runners.registry import get_runner
+from services.container import ServiceContainer
 
 
-def build_attempt(db: Session, attempt_id: str) -> None:
+def build_attempt(db: Session, attempt_id: str, services: ServiceContainer) -> None:
     with attempt_lock(attempt_id):
         attempt = db.query(Attempt).filter(Attempt.attempt_id == attempt_id).first()
         if attempt is None:
@@ -22,7 +22,7 @@ def build_attempt(db: Session, attempt_id: str) -> None:
         append_attempt_log(corpus.corpus_id, attempt_id, "Build started")
 
         try:
-            runner = get_runner(attempt.runner_type)
+            runner = services.runner(attempt.runner_type)
             artifacts = runner.build_index(
                 corpus_id=corpus.corpus_id,
                 attempt_id=attempt_id,
@@ -36,6 +36,17 @@ def build_attempt(db: Session, attempt_id: str) -> None:
             attempt.finished_at = datetime.now(timezone.utc)
             corpus.latest_success_attempt_id = attempt_id
             db.commit()
+            embedding = (artifacts or {}).get("embedding")
+            if embedding:
+                append_attempt_log(
+                    corpus.corpus_id,
+                    attempt_id,
+                    f"Embedded {embedding['texts']} texts ({embedding['tokens']} tokens) "
+                    f"in {embedding['requests']} requests over {embedding['elapsed_seconds']}s: "
+                    f"{embedding['tokens_per_second']} tokens/s, "
+                    f"{embedding['rate_limited']} rate-limited, "
+                    f"{embedding['waited_seconds']}s waiting",
+                )
             append_attempt_log(corpus.corpus_id, attempt_id, "Build completed successfully")
         except Exception as exc:  # noqa: BLE001
             attempt.status = "failed"
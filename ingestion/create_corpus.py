@@ -46,6 +46,12 @@ def create_corpus(
             "chunk_token_size": 1200,
             "chunk_overlap_token_size": 100,
             "top_k": 5,
+            "kv_layout": settings.KV_LAYOUT,
+            "vector_backend": settings.VECTOR_BACKEND,
+            "vector_quantization": settings.VECTOR_QUANTIZATION,
+            "chroma_layout": settings.CHROMA_LAYOUT,
+            "chroma_shards": settings.CHROMA_SHARDS,
+            "embedding_model": settings.OPENAI_EMBED_MODEL,
         },
         artifacts=None,
     )
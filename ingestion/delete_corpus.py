@@ -1,48 +1,88 @@
+import shutil
+from typing import Callable
+
 from sqlalchemy.orm import Session
 
+from _storage import attempt_collection_names
 from config import get_settings
 from db.models import Attempt, Corpus
-from ingestion.storage_fs import delete_corpus_folder
-from services.chroma_client import ChromaClient
-from services.neo4j_client import Neo4jClient
-from services.redis_client import RedisClient
+from ingestion.storage_fs import append_attempt_log, delete_corpus_folder
+from services.container import ServiceContainer
 
 settings = get_settings()
 
 
-def delete_corpus(db: Session, corpus_id: str) -> bool:
+def _progress_logger(corpus_id: str, attempt_id: str, what: str) -> Callable[[int], None]:
+    return lambda count: append_attempt_log(corpus_id, attempt_id, f"Deleted {count} {what}")
+
+
+def _chroma_collections(attempt: Attempt) -> tuple[str, list[str]]:
+    artifacts = attempt.artifacts or {}
+    config = attempt.config or {}
+    layout = artifacts.get("chroma_layout") or config.get("chroma_layout", "per_attempt")
+    model = artifacts.get("embedding_model") or config.get(
+        "embedding_model", settings.OPENAI_EMBED_MODEL
+    )
+    if "chroma_collections" in artifacts:
+        return layout, artifacts["chroma_collections"]
+    if "chroma_collection" in artifacts:
+        return layout, [artifacts["chroma_collection"]]
+    if config.get("vector_backend", "chroma") != "chroma":
+        return layout, []
+    # No build artifacts (e.g. a failed build): derive the names from the attempt config.
+    collections = attempt_collection_names(
+        attempt.attempt_id,
+        layout,
+        model,
+        int(config.get("chroma_shards", settings.CHROMA_SHARDS)),
+    )
+    if layout != "shared":
+        collections.append(f"col__{attempt.attempt_id}")
+    return layout, collections
+
+
+def delete_corpus(db: Session, corpus_id: str, services: ServiceContainer) -> bool:
     corpus = db.query(Corpus).filter(Corpus.corpus_id == corpus_id).first()
     if corpus is None:
         return False
 
     attempts = db.query(Attempt).filter(Attempt.corpus_id == corpus_id).all()
 
-    chroma = ChromaClient(settings.CHROMA_HOST, settings.CHROMA_PORT)
-    neo4j = Neo4jClient(settings.NEO4J_URI, settings.NEO4J_USER, settings.NEO4J_PASSWORD)
-    redis = RedisClient(settings.REDIS_URL)
+    chroma = services.chroma
+    neo4j = services.neo4j
+    redis = services.redis
 
     for attempt in attempts:
         artifacts = attempt.artifacts or {}
-        collections = artifacts.get(
-            "chroma_collections",
-            [artifacts.get("chroma_collection", f"col__{attempt.attempt_id}")],
-        )
+        layout, collections = _chroma_collections(attempt)
         for collection in collections:
-            if collection:
+            if not collection:
+                continue
+            if layout == "shared":
+                chroma.delete_where(collection, {"attempt_id": attempt.attempt_id})
+            else:
                 chroma.delete_collection(collection)
 
+        vector_index = artifacts.get("vector_index")
+        if vector_index:
+            shutil.rmtree(vector_index, ignore_errors=True)
+
+        neo4j_progress = _progress_logger(corpus_id, attempt.attempt_id, "Neo4j nodes")
         neo4j_namespace = artifacts.get("neo4j_namespace")
         if neo4j_namespace:
-            neo4j.delete_namespace(neo4j_namespace)
+            neo4j.delete_namespace(neo4j_namespace, progress=neo4j_progress)
         else:
-            neo4j.delete_attempt(attempt.attempt_id)
+            neo4j.delete_attempt(attempt.attempt_id, progress=neo4j_progress)
 
-        redis.delete_attempt_keys(attempt.attempt_id)
+        redis.delete_attempt_keys(
+            attempt.attempt_id,
+            progress=_progress_logger(corpus_id, attempt.attempt_id, "Redis keys"),
+        )
+        services.runner(attempt.runner_type).evict_attempt(attempt.attempt_id)
         db.delete(attempt)
 
     db.delete(corpus)
     db.commit()
     delete_corpus_folder(corpus_id)
-    neo4j.close()
 
     return True
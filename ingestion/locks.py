@@ -3,6 +3,7 @@ from threading import Lock
 
 _lock = Lock()
 _locks: dict[str, Lock] = {}
+_deleting: set[str] = set()
 
 
 @contextmanager
@@ -15,4 +16,17 @@ def attempt_lock(attempt_id: str):
     try:
         yield
     finally:
-        lock.release()
+        lock.release()
+
+
+def claim_corpus_delete(corpus_id: str) -> bool:
+    with _lock:
+        if corpus_id in _deleting:
+            return False
+        _deleting.add(corpus_id)
+        return True
+
+
+def release_corpus_delete(corpus_id: str) -> None:
+    with _lock:
+        _deleting.discard(corpus_id)
@@ -1,5 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, AsyncIterator
 
 
 class BaseRagRunner(ABC):
@@ -15,7 +16,7 @@ class BaseRagRunner(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def retrieve(
+    async def retrieve(
         self,
         corpus_id: str,
         attempt_id: str,
@@ -27,5 +28,130 @@ class BaseRagRunner(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def answer(self, question: str, contexts: list[dict[str, Any]]) -> str:
+    async def answer(self, question: str, contexts: list[dict[str, Any]]) -> str:
         raise NotImplementedError
+
+    async def retrieve_and_answer(
+        self,
+        corpus_id: str,
+        attempt_id: str,
+        question: str,
+        top_k: int,
+        expand_graph: bool,
+        config: dict[str, Any] | None = None,
+    ) -> tuple[str, list[dict[str, Any]]]:
+        contexts = await self.retrieve(
+            corpus_id=corpus_id,
+            attempt_id=attempt_id,
+            question=question,
+            top_k=top_k,
+            expand_graph=expand_graph,
+            config=config,
+        )
+        return await self.answer(question, contexts), contexts
+
+    async def retrieve_and_stream_answer(
+        self,
+        corpus_id: str,
+        attempt_id: str,
+        question: str,
+        top_k: int,
+        expand_graph: bool,
+        config: dict[str, Any] | None = None,
+    ) -> tuple[list[dict[str, Any]], AsyncIterator[str]]:
+        answer, contexts = await self.retrieve_and_answer(
+            corpus_id=corpus_id,
+            attempt_id=attempt_id,
+            question=question,
+            top_k=top_k,
+            expand_graph=expand_graph,
+            config=config,
+        )
+
+        async def _tokens() -> AsyncIterator[str]:
+            yield answer
+
+        return contexts, _tokens()
+
+    async def retrieve_and_answer_batch(
+        self,
+        corpus_id: str,
+        attempt_id: str,
+        questions: list[str],
+        top_k: int,
+        expand_graph: bool,
+        config: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        results = []
+        for question in questions:
+            try:
+                answer, contexts = await self.retrieve_and_answer(
+                    corpus_id=corpus_id,
+                    attempt_id=attempt_id,
+                    question=question,
+                    top_k=top_k,
+                    expand_graph=expand_graph,
+                    config=config,
+                )
+                item = {"answer": answer, "contexts": contexts, "error": None}
+            except Exception as exc:  # noqa: BLE001
+                item = {"answer": None, "contexts": [], "error": str(exc)}
+            results.append({"question": question, **item})
+        return results
+
+    async def retrieve_and_answer_federated(
+        self,
+        targets: list[dict[str, Any]],
+        question: str,
+        top_k: int,
+        expand_graph: bool,
+    ) -> tuple[str, list[dict[str, Any]], dict[str, Any]]:
+        shards = await asyncio.gather(
+            *[
+                self.retrieve(
+                    corpus_id=target["corpus_id"],
+                    attempt_id=target["attempt_id"],
+                    question=question,
+                    top_k=top_k,
+                    expand_graph=expand_graph,
+                    config=target.get("config"),
+                )
+                for target in targets
+            ],
+            return_exceptions=True,
+        )
+        failed = [
+            {
+                "corpus_id": target["corpus_id"],
+                "attempt_id": target["attempt_id"],
+                "error": str(shard),
+            }
+            for target, shard in zip(targets, shards)
+            if isinstance(shard, Exception)
+        ]
+        if len(failed) == len(targets):
+            raise RuntimeError(f"All {len(targets)} corpora failed: {failed[0]['error']}")
+        contexts = [
+            {
+                **context,
+                "meta": {
+                    **context.get("meta", {}),
+                    "corpus_id": target["corpus_id"],
+                    "attempt_id": target["attempt_id"],
+                },
+            }
+            for target, shard in zip(targets, shards)
+            if not isinstance(shard, Exception)
+            for context in shard
+        ]
+        contexts = sorted(contexts, key=lambda c: c["score"], reverse=True)[:top_k]
+        return await self.answer(question, contexts), contexts, {"failed_shards": failed}
+
+    def evict_attempt(self, attempt_id: str) -> int:
+        return 0
+
+    def stats(self) -> dict[str, Any]:
+        return {}
+
+    async def aclose(self) -> None:
+        return
@@ -0,0 +1,143 @@
+from functools import lru_cache
+from threading import Lock
+from typing import Any
+
+import tiktoken
+
+_MAX_OVERLAP_TOKENS = 512
+_MAX_BOUNDARY_SHIFT = 4
+
+
+@lru_cache
+def _encoding(model: str) -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def _overlap(left: list[int], right: list[int]) -> int:
+    for size in range(min(len(left), len(right), _MAX_OVERLAP_TOKENS), 0, -1):
+        if left[-size:] == right[:size]:
+            return size
+    return 0
+
+
+def _decodes_cleanly(encoding: tiktoken.Encoding, tokens: list[int]) -> bool:
+    try:
+        encoding.decode_bytes(tokens).decode("utf-8")
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _clean_cut(
+    encoding: tiktoken.Encoding, tokens: list[int], start: int, end: int
+) -> list[int] | None:
+    # Widen a cut that splits a multi-byte character so decoding never yields U+FFFD.
+    for widen_start in range(min(start, _MAX_BOUNDARY_SHIFT) + 1):
+        for widen_end in range(min(len(tokens) - end, _MAX_BOUNDARY_SHIFT) + 1):
+            cut = tokens[start - widen_start : end + widen_end]
+            if _decodes_cleanly(encoding, cut):
+                return cut
+    return None
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+class ContextPacker:
+    def __init__(self, model: str, default_budget: int) -> None:
+        self._model = model
+        self._default_budget = default_budget
+        self._lock = Lock()
+        self.calls = 0
+        self.dropped_tokens = 0
+        self.dropped_items = 0
+        self.duplicates = 0
+        self.max_packed_tokens = 0
+
+    def pack(
+        self, contexts: list[dict[str, Any]], budget: int | None = None
+    ) -> tuple[list[dict[str, Any]], dict[str, int]]:
+        budget = self._default_budget if budget is None else int(budget)
+        encoding = _encoding(self._model)
+        kept: list[tuple[dict[str, Any], list[int]]] = []
+        seen: list[str] = []
+        used = dropped_tokens = dropped_items = duplicates = 0
+
+        for context in sorted(contexts, key=lambda c: c["score"], reverse=True):
+            normalized = _normalize(context["text"])
+            if not normalized or any(normalized in text for text in seen):
+                duplicates += 1
+                continue
+            full_tokens = encoding.encode(context["text"])
+            start, end = self._trim_chunk_overlap(context, full_tokens, kept)
+            if start >= end:
+                duplicates += 1
+                continue
+            tokens = full_tokens
+            if end - start != len(full_tokens):
+                tokens = _clean_cut(encoding, full_tokens, start, end)
+                if tokens is None:
+                    dropped_tokens += end - start
+                    dropped_items += 1
+                    continue
+                context = {**context, "text": encoding.decode(tokens)}
+            if used + len(tokens) > budget:
+                dropped_tokens += len(tokens)
+                dropped_items += 1
+                continue
+            kept.append((context, tokens))
+            seen.append(normalized)
+            used += len(tokens)
+
+        report = {
+            "budget": budget,
+            "used_tokens": used,
+            "dropped_tokens": dropped_tokens,
+            "dropped_items": dropped_items,
+            "duplicates": duplicates,
+        }
+        with self._lock:
+            self.calls += 1
+            self.dropped_tokens += dropped_tokens
+            self.dropped_items += dropped_items
+            self.duplicates += duplicates
+            self.max_packed_tokens = max(self.max_packed_tokens, used)
+        return [context for context, _ in kept], report
+
+    @staticmethod
+    def _trim_chunk_overlap(
+        context: dict[str, Any],
+        tokens: list[int],
+        kept: list[tuple[dict[str, Any], list[int]]],
+    ) -> tuple[int, int]:
+        start, end = 0, len(tokens)
+        meta = context.get("meta", {})
+        order = meta.get("chunk_order_index")
+        if meta.get("type") != "chunk" or order is None:
+            return start, end
+        for other, other_tokens in kept:
+            other_meta = other.get("meta", {})
+            if other_meta.get("type") != "chunk" or other_meta.get("full_doc_id") != meta.get(
+                "full_doc_id"
+            ):
+                continue
+            if other_meta.get("chunk_order_index") == order - 1:
+                start += _overlap(other_tokens, tokens[start:end])
+            elif other_meta.get("chunk_order_index") == order + 1:
+                end -= _overlap(tokens[start:end], other_tokens)
+        return start, end
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "budget": self._default_budget,
+                "dropped_tokens": self.dropped_tokens,
+                "dropped_items": self.dropped_items,
+                "duplicates": self.duplicates,
+                "max_packed_tokens": self.max_packed_tokens,
+            }
@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Awaitable, Callable
+
+import numpy as np
+
+from runners.embedding_store import FileEmbeddingStore
+from services.redis_client import get_async_redis
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        model: str,
+        redis_url: str,
+        max_items: int,
+        ttl_seconds: int,
+        store_dir: Path | None = None,
+        max_connections: int | None = None,
+    ) -> None:
+        self._model = model
+        self._redis_url = redis_url
+        self._max_connections = max_connections
+        self._max_items = max(1, max_items)
+        self._ttl_seconds = ttl_seconds
+        self._store = FileEmbeddingStore(store_dir / model) if store_dir is not None else None
+        self._lru: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = Lock()
+        self.memory_hits = 0
+        self.file_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @property
+    def _client(self):
+        return get_async_redis(
+            self._redis_url, decode_responses=False, max_connections=self._max_connections
+        )
+
+    async def _load(self, keys: list[str]) -> dict[str, np.ndarray]:
+        found: dict[str, np.ndarray] = {}
+        if self._store is not None:
+            found = await asyncio.to_thread(self._store.get_many, keys)
+            self.file_hits += len(found)
+            keys = [key for key in keys if key not in found]
+            if not keys:
+                return found
+        raws = await self._client.mget(keys)
+        cached = {
+            key: np.frombuffer(raw, dtype=np.float32)
+            for key, raw in zip(keys, raws)
+            if raw is not None
+        }
+        self.redis_hits += len(cached)
+        return {**found, **cached}
+
+    async def _save(self, vectors: dict[str, np.ndarray]) -> None:
+        pipe = self._client.pipeline(transaction=False)
+        for key, vector in vectors.items():
+            pipe.set(key, vector.tobytes(), ex=self._ttl_seconds or None)
+        await pipe.execute()
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"emb:{self._model}:{digest}"
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._lru[key] = vector
+            self._lru.move_to_end(key)
+            while len(self._lru) > self._max_items:
+                self._lru.popitem(last=False)
+
+    async def embed(
+        self,
+        texts: list[str],
+        embed_func: Callable[[list[str]], Awaitable[np.ndarray]],
+        persist: bool = False,
+    ) -> np.ndarray:
+        keys = [self._key(text) for text in texts]
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    found[key] = vector
+        self.memory_hits += sum(1 for key in keys if key in found)
+
+        pending = list(dict.fromkeys(key for key in keys if key not in found))
+        if pending:
+            stored = await self._load(pending)
+            for key, vector in stored.items():
+                found[key] = vector
+                self._remember(key, vector)
+
+        missing = list(dict.fromkeys(
+            (key, text) for key, text in zip(keys, texts) if key not in found
+        ))
+        if missing:
+            self.misses += len(missing)
+            vectors = np.asarray(
+                await embed_func([text for _, text in missing]), dtype=np.float32
+            )
+            for (key, _), vector in zip(missing, vectors):
+                found[key] = vector
+                self._remember(key, vector)
+            await self._save({key: vector for (key, _), vector in zip(missing, vectors)})
+
+        # Only index builds persist to the file store; query embeddings stay in Redis.
+        if persist and self._store is not None:
+            await asyncio.to_thread(self._store.put_many, {key: found[key] for key in keys})
+
+        return np.stack([found[key] for key in keys])
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            size = len(self._lru)
+        hits = self.memory_hits + self.file_hits + self.redis_hits
+        lookups = hits + self.misses
+        return {
+            "size": size,
+            "max_size": self._max_items,
+            "store": "file" if self._store is not None else "redis",
+            "stored": len(self._store) if self._store is not None else None,
+            "memory_hits": self.memory_hits,
+            "file_hits": self.file_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+        }
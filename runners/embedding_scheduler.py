@@ -0,0 +1,148 @@
+import asyncio
+import random
+import re
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Mapping
+
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+_TRANSIENT_ERRORS = (APIConnectionError, APITimeoutError, InternalServerError)
+
+
+def _parse_duration(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _UNITS[unit] for amount, unit in parts)
+
+
+def _retry_delay(headers: Mapping[str, str]) -> float | None:
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    return _parse_duration(headers.get("retry-after")) or _parse_duration(
+        headers.get("x-ratelimit-reset-tokens")
+    )
+
+
+def _backoff(attempt: int) -> float:
+    return min(60.0, 2.0**attempt) * (1 + random.random() * 0.25)
+
+
+def estimate_tokens(texts: list[str]) -> int:
+    return sum(len(text) // 4 + 1 for text in texts)
+
+
+class EmbeddingScheduler:
+    def __init__(
+        self,
+        max_concurrency: int,
+        tokens_per_minute: int = 0,
+        max_retries: int = 6,
+    ) -> None:
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._tokens_per_minute = tokens_per_minute
+        self._max_retries = max_retries
+        self._window: deque[tuple[float, int]] = deque()
+        self._window_lock = asyncio.Lock()
+        self._paused_until = 0.0
+        self._started_at: float | None = None
+        self.requests = 0
+        self.texts = 0
+        self.tokens = 0
+        self.rate_limited = 0
+        self.transient_errors = 0
+        self.waited_seconds = 0.0
+
+    async def _wait(self, seconds: float) -> None:
+        if seconds > 0:
+            self.waited_seconds += seconds
+            await asyncio.sleep(seconds)
+
+    async def _reserve(self, tokens: int) -> None:
+        async with self._window_lock:
+            await self._wait(self._paused_until - time.monotonic())
+            if self._tokens_per_minute <= 0:
+                return
+            tokens = min(tokens, self._tokens_per_minute)
+            while True:
+                now = time.monotonic()
+                while self._window and now - self._window[0][0] >= 60:
+                    self._window.popleft()
+                used = sum(count for _, count in self._window)
+                if used + tokens <= self._tokens_per_minute:
+                    self._window.append((now, tokens))
+                    return
+                await self._wait(60 - (now - self._window[0][0]))
+
+    def _observe(self, headers: Mapping[str, str], next_tokens: int) -> None:
+        remaining = headers.get("x-ratelimit-remaining-tokens")
+        reset = _parse_duration(headers.get("x-ratelimit-reset-tokens"))
+        try:
+            low = remaining is not None and int(remaining) < next_tokens
+        except ValueError:
+            low = False
+        if low and reset:
+            self._paused_until = max(self._paused_until, time.monotonic() + reset)
+
+    async def run(
+        self,
+        texts: list[str],
+        request: Callable[[list[str]], Awaitable[tuple[Any, Mapping[str, str], int | None]]],
+    ) -> Any:
+        if self._started_at is None:
+            self._started_at = time.monotonic()
+        estimate = estimate_tokens(texts)
+        for attempt in range(self._max_retries + 1):
+            await self._reserve(estimate)
+            async with self._semaphore:
+                try:
+                    result, headers, used_tokens = await request(texts)
+                except RateLimitError as exc:
+                    self.rate_limited += 1
+                    if attempt >= self._max_retries:
+                        raise
+                    delay = _retry_delay(exc.response.headers) or min(60.0, 2.0**attempt)
+                    delay *= 1 + random.random() * 0.25
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                    continue
+                except _TRANSIENT_ERRORS:
+                    self.transient_errors += 1
+                    if attempt >= self._max_retries:
+                        raise
+                    failed = True
+                else:
+                    failed = False
+            if failed:
+                await self._wait(_backoff(attempt))
+                continue
+            self._observe(headers, estimate)
+            self.requests += 1
+            self.texts += len(texts)
+            self.tokens += used_tokens if used_tokens is not None else estimate
+            return result
+
+    def stats(self) -> dict[str, Any]:
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            "requests": self.requests,
+            "texts": self.texts,
+            "tokens": self.tokens,
+            "rate_limited": self.rate_limited,
+            "transient_errors": self.transient_errors,
+            "waited_seconds": round(self.waited_seconds, 2),
+            "elapsed_seconds": round(elapsed, 2),
+            "tokens_per_second": round(self.tokens / elapsed, 1) if elapsed else 0.0,
+        }
@@ -0,0 +1,80 @@
+import json
+from pathlib import Path
+from threading import Lock
+
+import numpy as np
+from filelock import FileLock
+
+
+class FileEmbeddingStore:
+    def __init__(self, root: Path) -> None:
+        self._root = root
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._meta_path = root / "meta.json"
+        self._index_path = root / "index.tsv"
+        self._vectors_path = root / "vectors.f32"
+        self._file_lock = FileLock(str(root / ".lock"))
+        self._lock = Lock()
+        self._rows: dict[str, int] = {}
+        self._index_offset = 0
+        self._dim: int | None = None
+        self._matrix: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _refresh(self) -> None:
+        if self._dim is None and self._meta_path.exists():
+            self._dim = int(json.loads(self._meta_path.read_text(encoding="utf-8"))["dim"])
+        if not self._index_path.exists():
+            return
+        with self._index_path.open("rb") as handle:
+            handle.seek(self._index_offset)
+            data = handle.read()
+        complete = data[: data.rfind(b"\n") + 1]
+        for line in complete.decode("utf-8").splitlines():
+            key, row = line.split("\t")
+            self._rows[key] = int(row)
+        self._index_offset += len(complete)
+        if self._dim and self._rows:
+            rows = self._vectors_path.stat().st_size // (self._dim * 4)
+            if self._matrix is None or len(self._matrix) < rows:
+                self._matrix = np.memmap(
+                    self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self._dim)
+                )
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        with self._lock:
+            if any(key not in self._rows for key in keys):
+                self._refresh()
+            if self._matrix is None:
+                return {}
+            return {
+                key: np.array(self._matrix[self._rows[key]])
+                for key in keys
+                if key in self._rows and self._rows[key] < len(self._matrix)
+            }
+
+    def put_many(self, items: dict[str, np.ndarray]) -> int:
+        if not items:
+            return 0
+        with self._lock, self._file_lock:
+            self._refresh()
+            pending = {k: v for k, v in items.items() if k not in self._rows}
+            if not pending:
+                return 0
+            if self._dim is None:
+                self._dim = int(len(next(iter(pending.values()))))
+                self._meta_path.write_text(json.dumps({"dim": self._dim}), encoding="utf-8")
+            start = (
+                self._vectors_path.stat().st_size // (self._dim * 4)
+                if self._vectors_path.exists()
+                else 0
+            )
+            matrix = np.asarray(list(pending.values()), dtype=np.float32).reshape(-1, self._dim)
+            with self._vectors_path.open("ab") as handle:
+                handle.write(matrix.tobytes())
+            with self._index_path.open("a", encoding="utf-8") as handle:
+                handle.writelines(f"{key}\t{start + i}\n" for i, key in enumerate(pending))
+            self._refresh()
+            return len(pending)
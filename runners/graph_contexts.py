@@ -0,0 +1,239 @@
+import asyncio
+from typing import Any
+
+from nano_graphrag._op import (
+    _find_most_related_community_from_entities,
+    _find_most_related_edges_from_entities,
+    _find_most_related_text_unit_from_entities,
+)
+from nano_graphrag._utils import (
+    compute_mdhash_id,
+    list_of_list_to_csv,
+    split_string_by_multi_markers,
+    truncate_list_by_token_size,
+)
+from nano_graphrag.base import QueryParam
+from nano_graphrag.prompt import GRAPH_FIELD_SEP
+
+
+def similarity(distance: float) -> float:
+    return 1.0 / (1.0 + distance)
+
+
+def _source_ids(value: str | None) -> list[str]:
+    if not value:
+        return []
+    return split_string_by_multi_markers(value, [GRAPH_FIELD_SEP])
+
+
+def _by_score(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return sorted(items, key=lambda item: item["score"], reverse=True)
+
+
+def _chunk_item(chunk_id: str, chunk: dict[str, Any], score: float, **meta: Any) -> dict[str, Any]:
+    return {
+        "text": chunk["content"],
+        "score": score,
+        "meta": {
+            "type": "chunk",
+            "id": chunk_id,
+            **meta,
+            "full_doc_id": chunk.get("full_doc_id"),
+            "chunk_order_index": chunk.get("chunk_order_index"),
+        },
+    }
+
+
+async def build_naive_contexts(
+    question: str, chunks_vdb: Any, text_chunks: Any, param: QueryParam
+) -> list[dict[str, Any]]:
+    hits = await chunks_vdb.query(question, top_k=param.top_k)
+    if not hits:
+        return []
+    chunks = await text_chunks.get_by_ids([hit["id"] for hit in hits])
+    pairs = [(hit, chunk) for hit, chunk in zip(hits, chunks) if chunk is not None]
+    pairs = truncate_list_by_token_size(
+        pairs,
+        key=lambda pair: pair[1]["content"],
+        max_token_size=param.naive_max_token_for_text_unit,
+    )
+    return [
+        _chunk_item(hit["id"], chunk, similarity(hit["distance"]), distance=hit["distance"])
+        for hit, chunk in pairs
+    ]
+
+
+async def build_local_contexts(
+    question: str,
+    graph: Any,
+    entities_vdb: Any,
+    community_reports: Any,
+    text_chunks: Any,
+    param: QueryParam,
+) -> list[dict[str, Any]]:
+    hits = await entities_vdb.query(question, top_k=param.top_k)
+    if not hits:
+        return []
+    names = [hit["entity_name"] for hit in hits]
+    nodes, degrees = await asyncio.gather(
+        asyncio.gather(*[graph.get_node(name) for name in names]),
+        asyncio.gather(*[graph.node_degree(name) for name in names]),
+    )
+    node_datas = [
+        {**node, "entity_name": name, "rank": degree}
+        for name, node, degree in zip(names, nodes, degrees)
+        if node is not None
+    ]
+    communities, text_units, relations = await asyncio.gather(
+        _find_most_related_community_from_entities(node_datas, param, community_reports),
+        _find_most_related_text_unit_from_entities(node_datas, param, text_chunks, graph),
+        _find_most_related_edges_from_entities(node_datas, param, graph),
+    )
+
+    entity_scores = {hit["entity_name"]: similarity(hit["distance"]) for hit in hits}
+    entity_distances = {hit["entity_name"]: hit["distance"] for hit in hits}
+    chunk_scores: dict[str, float] = {}
+    for node in node_datas:
+        for chunk_id in _source_ids(node.get("source_id")):
+            score = entity_scores[node["entity_name"]]
+            chunk_scores[chunk_id] = max(chunk_scores.get(chunk_id, 0.0), score)
+
+    items: list[dict[str, Any]] = []
+    for node in node_datas:
+        name = node["entity_name"]
+        items.append(
+            {
+                "text": f"{name} ({node.get('entity_type', 'UNKNOWN')}): "
+                f"{node.get('description', 'UNKNOWN')}",
+                "score": entity_scores[name],
+                "meta": {
+                    "type": "entity",
+                    "id": name,
+                    "distance": entity_distances[name],
+                    "entity_type": node.get("entity_type", "UNKNOWN"),
+                    "rank": node["rank"],
+                    "source_ids": _source_ids(node.get("source_id")),
+                },
+            }
+        )
+    for edge in relations:
+        source, target = edge["src_tgt"]
+        items.append(
+            {
+                "text": f"{source} -> {target}: {edge['description']}",
+                "score": max(entity_scores.get(source, 0.0), entity_scores.get(target, 0.0)),
+                "meta": {
+                    "type": "relation",
+                    "id": f"{source}|{target}",
+                    "source": source,
+                    "target": target,
+                    "weight": edge["weight"],
+                    "rank": edge["rank"],
+                    "source_ids": _source_ids(edge.get("source_id")),
+                },
+            }
+        )
+    for community in communities:
+        items.append(
+            {
+                "text": community["report_string"],
+                "score": max(
+                    (entity_scores.get(name, 0.0) for name in community.get("nodes", [])),
+                    default=0.0,
+                ),
+                "meta": {
+                    "type": "community",
+                    "id": community.get("title"),
+                    "level": community.get("level"),
+                    "rating": community["report_json"].get("rating"),
+                    "source_ids": community.get("chunk_ids", []),
+                },
+            }
+        )
+    for chunk in text_units:
+        chunk_id = compute_mdhash_id(chunk["content"], prefix="chunk-")
+        items.append(_chunk_item(chunk_id, chunk, chunk_scores.get(chunk_id, 0.0)))
+    return _by_score(items)
+
+
+async def fuse_lexical_chunks(
+    items: list[dict[str, Any]],
+    hits: list[dict[str, Any]],
+    text_chunks: Any,
+    rrf_k: int = 60,
+) -> list[dict[str, Any]]:
+    if not hits:
+        return items
+    chunks = {c["meta"]["id"]: c for c in items if c["meta"].get("type") == "chunk"}
+    others = [c for c in items if c["meta"].get("type") != "chunk"]
+    top = max((c["score"] for c in chunks.values()), default=0.0) or 1.0
+    fused: dict[str, float] = {}
+    for ranking in (list(chunks), [hit["id"] for hit in hits]):
+        for rank, chunk_id in enumerate(ranking):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+
+    missing = [hit["id"] for hit in hits if hit["id"] not in chunks]
+    for chunk_id, chunk in zip(missing, await text_chunks.get_by_ids(missing)):
+        if chunk is not None:
+            chunks[chunk_id] = _chunk_item(chunk_id, chunk, 0.0)
+
+    best = max(fused[chunk_id] for chunk_id in chunks) if chunks else 1.0
+    bm25 = {hit["id"]: hit["score"] for hit in hits}
+    for chunk_id, chunk in chunks.items():
+        meta = {**chunk["meta"], **({"bm25": bm25[chunk_id]} if chunk_id in bm25 else {})}
+        chunks[chunk_id] = {**chunk, "score": top * fused[chunk_id] / best, "meta": meta}
+    return _by_score(others + list(chunks.values()))
+
+
+def render_contexts(mode: str, contexts: list[dict[str, Any]]) -> str:
+    if mode != "local":
+        return "--New Chunk--\n".join(c["text"] for c in contexts)
+
+    def _section(context_type: str) -> list[dict[str, Any]]:
+        return [c for c in contexts if c["meta"].get("type") == context_type]
+
+    entities = [["id", "entity", "type", "description", "rank"]]
+    for i, c in enumerate(_section("entity")):
+        meta = c["meta"]
+        description = c["text"][len(f"{meta['id']} ({meta.get('entity_type')}): ") :]
+        entities.append([i, meta["id"], meta.get("entity_type"), description, meta.get("rank")])
+    relations = [["id", "source", "target", "description", "weight", "rank"]]
+    for i, c in enumerate(_section("relation")):
+        meta = c["meta"]
+        description = c["text"][len(f"{meta['source']} -> {meta['target']}: ") :]
+        relations.append(
+            [i, meta["source"], meta["target"], description, meta.get("weight"), meta.get("rank")]
+        )
+    communities = [["id", "content"]]
+    communities.extend([i, c["text"]] for i, c in enumerate(_section("community")))
+    sources = [["id", "content"]]
+    sources.extend([i, c["text"]] for i, c in enumerate(_section("chunk")))
+    return f"""
+-----Reports-----
+```csv
+{list_of_list_to_csv(communities)}
+```
+-----Entities-----
+```csv
+{list_of_list_to_csv(entities)}
+```
+-----Relationships-----
+```csv
+{list_of_list_to_csv(relations)}
+```
+-----Sources-----
+```csv
+{list_of_list_to_csv(sources)}
+```
+"""
+
+
+def top_k_per_type(contexts: list[dict[str, Any]], top_k: int) -> list[dict[str, Any]]:
+    counts: dict[str, int] = {}
+    kept = []
+    for context in _by_score(contexts):
+        context_type = context["meta"].get("type", "")
+        if counts.get(context_type, 0) < top_k:
+            counts[context_type] = counts.get(context_type, 0) + 1
+            kept.append(context)
+    return kept
@@ -1,23 +1,59 @@
+import asyncio
+import base64
+import inspect
 import os
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, AsyncIterator, Callable, Iterator
 
 import numpy as np
-from openai import AsyncOpenAI
+from openai import APIConnectionError, AsyncOpenAI, RateLimitError
 from nano_graphrag import GraphRAG
 from nano_graphrag.base import QueryParam
-from nano_graphrag._llm import openai_complete_if_cache
-from nano_graphrag._storage import Neo4jStorage
+from nano_graphrag.prompt import PROMPTS
 from nano_graphrag._storage.gdb_neo4j import make_path_idable
-from nano_graphrag._utils import wrap_embedding_func_with_attrs
+from nano_graphrag._utils import compute_args_hash, logger, wrap_embedding_func_with_attrs
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
-from _storage import ChromaVectorStorage, RedisKVStorage
+from _storage import (
+    BatchedNeo4jStorage,
+    ChromaVectorStorage,
+    HNSWVectorStorage,
+    QuantizedVectorStorage,
+    RedisHashKVStorage,
+    RedisKVStorage,
+    attempt_collection_names,
+)
+from _storage.kv_cache import get_kv_read_cache
 from config import get_settings
 from runners.base import BaseRagRunner
+from runners.context_packer import ContextPacker
+from runners.embedding_cache import EmbeddingCache
+from runners.embedding_scheduler import EmbeddingScheduler
+from runners.graph_contexts import (
+    build_local_contexts,
+    build_naive_contexts,
+    fuse_lexical_chunks,
+    render_contexts,
+    top_k_per_type,
+)
+from runners.lexical_index import LexicalIndex, build_lexical_index, is_decisive
+from runners.rag_cache import RagCache, config_hash
+from runners.semantic_cache import SemanticAnswerCache
 from services.openai_client import OpenAIClient
+from services.neo4j_client import close_async_neo4j
+from services.redis_client import close_async_redis
 
 settings = get_settings()
 
+_MAX_EMBEDDING_INPUTS = 2048
+
+_VECTOR_BACKENDS = {
+    "chroma": ChromaVectorStorage,
+    "hnsw": HNSWVectorStorage,
+    "quantized": QuantizedVectorStorage,
+}
+
 
 def _attempt_working_dir(corpus_id: str, attempt_id: str) -> Path:
     return Path(settings.DATA_DIR) / "corpora" / corpus_id / "attempts" / attempt_id / "nanographrag"
@@ -32,45 +68,233 @@ def _embedding_dim(model: str) -> int:
     return 1536
 
 
-def _make_embedding_func(model: str) -> Callable:
-    client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+def _decode_embeddings(response) -> np.ndarray:
+    return np.stack(
+        [np.frombuffer(base64.b64decode(item.embedding), dtype=np.float32) for item in response.data]
+    )
+
+
+def _make_embedding_func(
+    model: str,
+    client: AsyncOpenAI,
+    cache: EmbeddingCache | None = None,
+    scheduler: EmbeddingScheduler | None = None,
+    persist: bool = False,
+) -> Callable:
     dim = _embedding_dim(model)
 
-    @wrap_embedding_func_with_attrs(embedding_dim=dim, max_token_size=8192)
-    async def _embed(texts: list[str]) -> np.ndarray:
+    async def _scheduled_call(texts: list[str]):
+        raw = await client.with_options(max_retries=0).embeddings.with_raw_response.create(
+            model=model, input=texts, encoding_format="base64"
+        )
+        response = raw.parse()
+        used = response.usage.prompt_tokens if response.usage else None
+        return _decode_embeddings(response), raw.headers, used
+
+    async def _request(texts: list[str]) -> np.ndarray:
+        if scheduler is not None:
+            return await scheduler.run(texts, _scheduled_call)
         response = await client.embeddings.create(
-            model=model, input=texts, encoding_format="float"
+            model=model, input=texts, encoding_format="base64"
         )
-        return np.array([item.embedding for item in response.data])
+        return _decode_embeddings(response)
+
+    @wrap_embedding_func_with_attrs(embedding_dim=dim, max_token_size=8192)
+    async def _embed(texts: list[str]) -> np.ndarray:
+        if cache is None:
+            return await _request(texts)
+        return await cache.embed(texts, _request, persist=persist)
 
     return _embed
 
 
-def _make_model_func(model: str) -> Callable:
-    async def _complete(prompt, system_prompt=None, history_messages=[], **kwargs) -> str:
-        return await openai_complete_if_cache(
-            model,
-            prompt,
-            system_prompt=system_prompt,
-            history_messages=history_messages,
-            **kwargs,
-        )
+async def _replay(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+async def _iter_stream(stream, on_done: Callable | None = None) -> AsyncIterator[str]:
+    parts: list[str] = []
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            yield delta
+    if on_done is not None:
+        await on_done("".join(parts))
+
+
+async def _tee(tokens: AsyncIterator[str], on_done: Callable) -> AsyncIterator[str]:
+    parts: list[str] = []
+    async for token in tokens:
+        parts.append(token)
+        yield token
+    await on_done("".join(parts))
+
+
+class _ClosingIterator:
+    # Runs its closers exactly once on aclose(), even if iteration never started.
+    def __init__(self, tokens: AsyncIterator[str], *closers: Callable) -> None:
+        self._tokens = tokens
+        self._closers = list(closers)
+
+    def __aiter__(self) -> "_ClosingIterator":
+        return self
+
+    async def __anext__(self) -> str:
+        try:
+            return await self._tokens.__anext__()
+        except StopAsyncIteration:
+            await self.aclose()
+            raise
+
+    async def aclose(self) -> None:
+        closers, self._closers = self._closers, []
+        if not closers:
+            return
+        try:
+            if hasattr(self._tokens, "aclose"):
+                await self._tokens.aclose()
+        finally:
+            for close in closers:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+
+
+def _make_model_func(model: str, client: AsyncOpenAI) -> Callable:
+    @retry(
+        stop=stop_after_attempt(5),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type((RateLimitError, APIConnectionError)),
+    )
+    async def _complete(prompt, system_prompt=None, history_messages=[], **kwargs):
+        hashing_kv = kwargs.pop("hashing_kv", None)
+        stream = kwargs.pop("stream", False)
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.extend(history_messages)
+        messages.append({"role": "user", "content": prompt})
+
+        if hashing_kv is not None:
+            args_hash = compute_args_hash(model, messages)
+            cached = await hashing_kv.get_by_id(args_hash)
+            if cached is not None:
+                return _replay(cached["return"]) if stream else cached["return"]
+
+        if stream:
+            async def _cache_result(content: str) -> None:
+                if hashing_kv is not None:
+                    await hashing_kv.upsert({args_hash: {"return": content, "model": model}})
+
+            response = await client.chat.completions.create(
+                model=model, messages=messages, stream=True, **kwargs
+            )
+            return _ClosingIterator(_iter_stream(response, _cache_result), response.close)
+
+        response = await client.chat.completions.create(model=model, messages=messages, **kwargs)
+        content = response.choices[0].message.content
+        if hashing_kv is not None:
+            await hashing_kv.upsert({args_hash: {"return": content, "model": model}})
+        return content
 
     return _complete
 
 
+async def _close_rag(rag: GraphRAG) -> None:
+    for storage in (rag.full_docs, rag.text_chunks, rag.llm_response_cache, rag.community_reports):
+        if storage is not None:
+            await storage.close()
+    await rag.chunk_entity_relation_graph.close()
+
+
+class _PrecomputedVectorResults:
+    def __init__(self, storage: Any, results: dict[str, list[dict[str, Any]]]) -> None:
+        self._storage = storage
+        self._results = results
+
+    async def query(self, query: str, top_k: int = 5) -> list[dict[str, Any]]:
+        results = self._results.get(query)
+        if results is None:
+            return await self._storage.query(query, top_k)
+        return results[:top_k]
+
+
+def _failed_shard(target: dict[str, Any], exc: BaseException) -> dict[str, Any]:
+    return {
+        "corpus_id": target["corpus_id"],
+        "attempt_id": target["attempt_id"],
+        "error": str(exc),
+    }
+
+
+def _query_param(top_k: int, expand_graph: bool) -> QueryParam:
+    return QueryParam(mode="local" if expand_graph else "naive", top_k=top_k)
+
+
+def _token_budget(config: dict[str, Any]) -> int:
+    return config.get("context_token_budget") or settings.CONTEXT_TOKEN_BUDGET
+
+
 class GraphRagRunner(BaseRagRunner):
-    def __init__(self) -> None:
-        self._last_rag: GraphRAG | None = None
-        self._last_param: QueryParam | None = None
-        self._last_question: str | None = None
-        self._fallback_openai = OpenAIClient(
-            api_key=settings.OPENAI_API_KEY,
-            model=settings.OPENAI_MODEL,
-            embed_model=settings.OPENAI_EMBED_MODEL,
+    def __init__(self, openai_client: OpenAIClient) -> None:
+        self._fallback_openai = openai_client
+        self._openai = openai_client.async_client
+        self._rags = RagCache(
+            max_size=settings.RAG_CACHE_MAX_SIZE,
+            idle_ttl_seconds=settings.RAG_CACHE_IDLE_TTL_SECONDS,
+            close_func=self._schedule_close,
         )
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._closing: set[asyncio.Future] = set()
+        self._embedding_cache = None
+        if settings.EMBEDDING_CACHE_ENABLED:
+            self._embedding_cache = EmbeddingCache(
+                model=settings.OPENAI_EMBED_MODEL,
+                redis_url=settings.REDIS_URL,
+                max_items=settings.EMBEDDING_CACHE_MAX_ITEMS,
+                ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+                store_dir=(
+                    Path(settings.DATA_DIR) / "embeddings"
+                    if settings.EMBEDDING_STORE == "file"
+                    else None
+                ),
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+            )
+        self._packer = ContextPacker(settings.OPENAI_MODEL, settings.CONTEXT_TOKEN_BUDGET)
+        self._semantic_cache = None
+        if settings.SEMANTIC_CACHE_ENABLED:
+            self._semantic_cache = SemanticAnswerCache(
+                settings.REDIS_URL,
+                threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+                max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+            )
 
-    def _build_rag(self, corpus_id: str, attempt_id: str, config: dict[str, Any]) -> GraphRAG:
+    def _schedule_close(self, rag: GraphRAG) -> None:
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            future = self._loop.create_task(_close_rag(rag))
+            self._closing.add(future)
+            future.add_done_callback(self._closing.discard)
+        else:
+            asyncio.run_coroutine_threadsafe(_close_rag(rag), self._loop)
+
+    def _build_rag(
+        self,
+        corpus_id: str,
+        attempt_id: str,
+        config: dict[str, Any],
+        openai_client: AsyncOpenAI,
+        embedding_scheduler: EmbeddingScheduler | None = None,
+    ) -> GraphRAG:
         os.environ.setdefault("OPENAI_API_KEY", settings.OPENAI_API_KEY)
 
         working_dir = _attempt_working_dir(corpus_id, attempt_id)
@@ -80,11 +304,24 @@ class GraphRagRunner(BaseRagRunner):
             "attempt_id": attempt_id,
             "corpus_id": corpus_id,
             "redis_url": settings.REDIS_URL,
+            "redis_max_connections": settings.REDIS_MAX_CONNECTIONS,
+            "kv_codec": settings.KV_CODEC,
+            "kv_compress_min_bytes": settings.KV_COMPRESS_MIN_BYTES,
+            "kv_read_cache": settings.KV_READ_CACHE,
             "chroma_host": settings.CHROMA_HOST,
             "chroma_port": settings.CHROMA_PORT,
             "neo4j_url": settings.NEO4J_URI,
             "neo4j_auth": (settings.NEO4J_USER, settings.NEO4J_PASSWORD),
+            "neo4j_max_pool_size": settings.NEO4J_MAX_POOL_SIZE,
+            "neo4j_write_batch_size": settings.NEO4J_WRITE_BATCH_SIZE,
+            "neo4j_write_concurrency": settings.NEO4J_WRITE_CONCURRENCY,
             "chroma_collection_prefix": "col",
+            "chroma_layout": config.get("chroma_layout", "per_attempt"),
+            "chroma_shards": int(config.get("chroma_shards", settings.CHROMA_SHARDS)),
+            "embedding_model": settings.OPENAI_EMBED_MODEL,
+            "embedding_batch_max_tokens": settings.EMBEDDING_BATCH_MAX_TOKENS,
+            "embedding_pipeline_depth": settings.EMBEDDING_MAX_CONCURRENCY,
+            "vector_quantization": config.get("vector_quantization", settings.VECTOR_QUANTIZATION),
         }
 
         rag = GraphRAG(
@@ -93,17 +330,93 @@ class GraphRagRunner(BaseRagRunner):
             enable_naive_rag=True,
             chunk_token_size=int(config.get("chunk_token_size", 1200)),
             chunk_overlap_token_size=int(config.get("chunk_overlap_token_size", 100)),
-            embedding_func=_make_embedding_func(settings.OPENAI_EMBED_MODEL),
-            best_model_func=_make_model_func(settings.OPENAI_MODEL),
-            cheap_model_func=_make_model_func(settings.OPENAI_MODEL),
-            key_string_value_json_storage_cls=RedisKVStorage,
-            vector_db_storage_cls=ChromaVectorStorage,
-            graph_storage_cls=Neo4jStorage,
+            embedding_func=_make_embedding_func(
+                settings.OPENAI_EMBED_MODEL,
+                openai_client,
+                self._embedding_cache,
+                embedding_scheduler,
+                persist=embedding_scheduler is not None,
+            ),
+            best_model_func=_make_model_func(settings.OPENAI_MODEL, openai_client),
+            cheap_model_func=_make_model_func(settings.OPENAI_MODEL, openai_client),
+            key_string_value_json_storage_cls=(
+                RedisHashKVStorage if config.get("kv_layout") == "hash" else RedisKVStorage
+            ),
+            vector_db_storage_cls=_VECTOR_BACKENDS.get(
+                config.get("vector_backend", "chroma"), ChromaVectorStorage
+            ),
+            graph_storage_cls=BatchedNeo4jStorage,
             addon_params=addon_params,
             tiktoken_model_name=settings.OPENAI_MODEL,
         )
         return rag
 
+    def _acquire_rag(self, corpus_id: str, attempt_id: str, config: dict[str, Any]) -> GraphRAG:
+        self._loop = asyncio.get_running_loop()
+        return self._rags.acquire(
+            (attempt_id, config_hash(config)),
+            lambda: self._build_rag(corpus_id, attempt_id, config, self._openai),
+        )
+
+    @contextmanager
+    def _rag(self, corpus_id: str, attempt_id: str, config: dict[str, Any]) -> Iterator[GraphRAG]:
+        rag = self._acquire_rag(corpus_id, attempt_id, config)
+        try:
+            yield rag
+        finally:
+            self._rags.release(rag)
+
+    def evict_attempt(self, attempt_id: str) -> int:
+        get_kv_read_cache().invalidate(attempt_id)
+        if self._semantic_cache is not None:
+            self._semantic_cache.evict_attempt(attempt_id)
+        return self._rags.evict(lambda key: key[0] == attempt_id)
+
+    def stats(self) -> dict[str, Any]:
+        stats = {
+            "rag": self._rags.stats(),
+            "packing": self._packer.stats(),
+            "kv_read": get_kv_read_cache().stats(),
+        }
+        if self._embedding_cache is not None:
+            stats["embedding"] = self._embedding_cache.stats()
+        if self._semantic_cache is not None:
+            stats["semantic"] = self._semantic_cache.stats()
+        return stats
+
+    async def aclose(self) -> None:
+        self._rags.clear()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+        if self._semantic_cache is not None:
+            await self._semantic_cache.aclose()
+        await close_async_redis()
+        await close_async_neo4j()
+
+    async def _abuild_index(
+        self, corpus_id: str, attempt_id: str, config: dict[str, Any], text: str
+    ) -> dict[str, Any]:
+        openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        scheduler = EmbeddingScheduler(
+            settings.EMBEDDING_MAX_CONCURRENCY, settings.EMBEDDING_TPM_LIMIT
+        )
+        rag = self._build_rag(corpus_id, attempt_id, config, openai_client, scheduler)
+        try:
+            await rag.ainsert(text)
+            keys = await rag.text_chunks.all_keys()
+            chunks = await rag.text_chunks.get_by_ids(keys)
+            await asyncio.to_thread(
+                build_lexical_index,
+                {key: chunk["content"] for key, chunk in zip(keys, chunks) if chunk},
+                _attempt_working_dir(corpus_id, attempt_id) / "lexical",
+            )
+            return scheduler.stats()
+        finally:
+            await _close_rag(rag)
+            await openai_client.close()
+            await close_async_redis()
+            await close_async_neo4j()
+
     def build_index(
         self,
         corpus_id: str,
@@ -113,24 +426,164 @@ class GraphRagRunner(BaseRagRunner):
         config: dict[str, Any],
     ) -> dict[str, Any]:
         text = Path(source_path).read_text(encoding="utf-8")
-        rag = self._build_rag(corpus_id, attempt_id, config)
-        rag.insert(text)
+        embedding_stats = asyncio.run(self._abuild_index(corpus_id, attempt_id, config, text))
+        self.evict_attempt(attempt_id)
 
         working_dir = _attempt_working_dir(corpus_id, attempt_id)
         neo4j_namespace = f"{make_path_idable(str(working_dir))}__chunk_entity_relation"
-        chroma_collections = [
-            f"col__{attempt_id}__entities",
-            f"col__{attempt_id}__chunks",
-        ]
+        vector_backend = config.get("vector_backend", "chroma")
+        chroma_layout = config.get("chroma_layout", "per_attempt")
+        if vector_backend != "chroma":
+            chroma_collections = []
+        else:
+            chroma_collections = attempt_collection_names(
+                attempt_id,
+                chroma_layout,
+                settings.OPENAI_EMBED_MODEL,
+                int(config.get("chroma_shards", settings.CHROMA_SHARDS)),
+            )
 
         return {
             "working_dir": str(working_dir),
             "neo4j_namespace": neo4j_namespace,
+            "vector_backend": vector_backend,
+            "chroma_layout": chroma_layout,
             "chroma_collections": chroma_collections,
+            "embedding_model": settings.OPENAI_EMBED_MODEL,
+            "vector_index": (
+                str(working_dir / "vectors") if vector_backend != "chroma" else None
+            ),
+            "lexical_index": str(working_dir / "lexical"),
             "redis_prefix": f"kv:{attempt_id}:",
+            "kv_layout": config.get("kv_layout", "keys"),
+            "embedding": embedding_stats,
         }
 
-    def retrieve(
+    async def _lexical_index(self, rag: GraphRAG) -> LexicalIndex | None:
+        if not settings.HYBRID_SEARCH_ENABLED:
+            return None
+        # Cached on the GraphRAG instance so it shares the RagCache entry's lifetime.
+        if hasattr(rag, "lexical_index"):
+            return rag.lexical_index
+        if not hasattr(rag, "lexical_lock"):
+            rag.lexical_lock = asyncio.Lock()
+        async with rag.lexical_lock:
+            if not hasattr(rag, "lexical_index"):
+                rag.lexical_index = await asyncio.to_thread(
+                    LexicalIndex.load, Path(rag.working_dir) / "lexical"
+                )
+        return rag.lexical_index
+
+    async def _aretrieve(
+        self,
+        rag: GraphRAG,
+        question: str,
+        param: QueryParam,
+        vdb: Any = None,
+    ) -> list[dict[str, Any]]:
+        index = await self._lexical_index(rag)
+        hits = index.search(question, param.top_k) if index is not None else []
+        if param.mode == "local":
+            items = await build_local_contexts(
+                question,
+                rag.chunk_entity_relation_graph,
+                vdb or rag.entities_vdb,
+                rag.community_reports,
+                rag.text_chunks,
+                param,
+            )
+        elif is_decisive(hits, settings.LEXICAL_DECISIVE_RATIO):
+            items = []
+        else:
+            items = await build_naive_contexts(
+                question, vdb or rag.chunks_vdb, rag.text_chunks, param
+            )
+        return await fuse_lexical_chunks(items, hits, rag.text_chunks)
+
+    def _pack(
+        self, contexts: list[dict[str, Any]], config: dict[str, Any] | None = None
+    ) -> list[dict[str, Any]]:
+        packed, report = self._packer.pack(contexts, (config or {}).get("context_token_budget"))
+        if report["dropped_tokens"]:
+            logger.info(
+                f"Context packing dropped {report['dropped_tokens']} tokens "
+                f"({report['dropped_items']} items), kept {report['used_tokens']}"
+            )
+        return packed
+
+    def _system_prompt(self, param: QueryParam, contexts: list[dict[str, Any]]) -> str:
+        context = render_contexts(param.mode, contexts)
+        if param.mode == "local":
+            return PROMPTS["local_rag_response"].format(
+                context_data=context, response_type=param.response_type
+            )
+        return PROMPTS["naive_rag_response"].format(
+            content_data=context, response_type=param.response_type
+        )
+
+    async def _aanswer(
+        self, rag: GraphRAG, question: str, param: QueryParam, contexts: list[dict[str, Any]]
+    ) -> str:
+        if not contexts:
+            return PROMPTS["fail_response"]
+        sys_prompt = self._system_prompt(param, contexts)
+        return await rag.best_model_func(question, system_prompt=sys_prompt)
+
+    async def _astream_answer(
+        self, rag: GraphRAG, question: str, param: QueryParam, contexts: list[dict[str, Any]]
+    ) -> AsyncIterator[str]:
+        if not contexts:
+            return _replay(PROMPTS["fail_response"])
+        sys_prompt = self._system_prompt(param, contexts)
+        return await rag.best_model_func(question, system_prompt=sys_prompt, stream=True)
+
+    async def _semantic_lookup(
+        self,
+        rag: GraphRAG,
+        attempt_id: str,
+        question: str,
+        param: QueryParam,
+        config: dict[str, Any],
+        embedding: np.ndarray | None = None,
+    ) -> tuple[np.ndarray | None, dict[str, Any] | None]:
+        if self._semantic_cache is None or not config.get("semantic_cache", True):
+            return None, None
+        if embedding is None:
+            embedding = (await rag.embedding_func([question]))[0]
+        entry = await self._semantic_cache.lookup(
+            attempt_id,
+            param.mode,
+            param.top_k,
+            _token_budget(config),
+            embedding,
+            threshold=config.get("semantic_cache_threshold"),
+        )
+        return embedding, entry
+
+    async def _semantic_store(
+        self,
+        attempt_id: str,
+        question: str,
+        param: QueryParam,
+        config: dict[str, Any],
+        embedding: np.ndarray | None,
+        answer: str,
+        contexts: list[dict[str, Any]],
+    ) -> None:
+        if self._semantic_cache is None or embedding is None or not contexts:
+            return
+        await self._semantic_cache.store(
+            attempt_id,
+            param.mode,
+            param.top_k,
+            _token_budget(config),
+            question,
+            embedding,
+            answer,
+            contexts,
+        )
+
+    async def retrieve(
         self,
         corpus_id: str,
         attempt_id: str,
@@ -139,23 +592,224 @@ class GraphRagRunner(BaseRagRunner):
         expand_graph: bool,
         config: dict[str, Any] | None = None,
     ) -> list[dict[str, Any]]:
-        rag = self._build_rag(corpus_id, attempt_id, config or {})
-        mode = "local" if expand_graph else "naive"
-        param = QueryParam(mode=mode, top_k=top_k, only_need_context=True)
-        context = rag.query(question, param)
-
-        self._last_rag = rag
-        self._last_param = QueryParam(mode=mode, top_k=top_k)
-        self._last_question = question
-
-        if not isinstance(context, str):
-            return []
-        return [{"text": context, "score": 0.0, "meta": {"mode": mode}}]
-
-    def answer(self, question: str, contexts: list[dict[str, Any]]) -> str:
-        if self._last_rag and self._last_param and self._last_question == question:
-            try:
-                return self._last_rag.query(question, self._last_param)
-            except Exception:
-                pass
-        return self._fallback_openai.answer(question, contexts)
+        config = config or {}
+        param = _query_param(top_k, expand_graph)
+        with self._rag(corpus_id, attempt_id, config) as rag:
+            _, cached = await self._semantic_lookup(rag, attempt_id, question, param, config)
+            if cached is not None:
+                return cached["contexts"]
+            return await self._aretrieve(rag, question, param)
+
+    async def answer(self, question: str, contexts: list[dict[str, Any]]) -> str:
+        return await asyncio.to_thread(
+            self._fallback_openai.answer, question, self._pack(contexts)
+        )
+
+    async def retrieve_and_answer(
+        self,
+        corpus_id: str,
+        attempt_id: str,
+        question: str,
+        top_k: int,
+        expand_graph: bool,
+        config: dict[str, Any] | None = None,
+    ) -> tuple[str, list[dict[str, Any]]]:
+        config = config or {}
+        param = _query_param(top_k, expand_graph)
+        with self._rag(corpus_id, attempt_id, config) as rag:
+            embedding, cached = await self._semantic_lookup(
+                rag, attempt_id, question, param, config
+            )
+            if cached is not None:
+                return cached["answer"], cached["contexts"]
+            contexts = self._pack(await self._aretrieve(rag, question, param), config)
+            answer = await self._aanswer(rag, question, param, contexts)
+        await self._semantic_store(
+            attempt_id, question, param, config, embedding, answer, contexts
+        )
+        return answer, contexts
+
+    async def retrieve_and_stream_answer(
+        self,
+        corpus_id: str,
+        attempt_id: str,
+        question: str,
+        top_k: int,
+        expand_graph: bool,
+        config: dict[str, Any] | None = None,
+    ) -> tuple[list[dict[str, Any]], AsyncIterator[str]]:
+        config = config or {}
+        param = _query_param(top_k, expand_graph)
+        rag = self._acquire_rag(corpus_id, attempt_id, config)
+        try:
+            embedding, cached = await self._semantic_lookup(
+                rag, attempt_id, question, param, config
+            )
+            if cached is not None:
+                self._rags.release(rag)
+                return cached["contexts"], _replay(cached["answer"])
+            contexts = self._pack(await self._aretrieve(rag, question, param), config)
+            tokens = await self._astream_answer(rag, question, param, contexts)
+        except BaseException:
+            self._rags.release(rag)
+            raise
+
+        async def _remember(answer: str) -> None:
+            await self._semantic_store(
+                attempt_id, question, param, config, embedding, answer, contexts
+            )
+
+        return contexts, _ClosingIterator(
+            _tee(tokens, _remember), tokens.aclose, lambda: self._rags.release(rag)
+        )
+
+    async def retrieve_and_answer_batch(
+        self,
+        corpus_id: str,
+        attempt_id: str,
+        questions: list[str],
+        top_k: int,
+        expand_graph: bool,
+        config: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        config = config or {}
+        with self._rag(corpus_id, attempt_id, config) as rag:
+            return await self._abatch(rag, attempt_id, questions, top_k, expand_graph, config)
+
+    async def _abatch(
+        self,
+        rag: GraphRAG,
+        attempt_id: str,
+        questions: list[str],
+        top_k: int,
+        expand_graph: bool,
+        config: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        param = _query_param(top_k, expand_graph)
+        unique = list(dict.fromkeys(questions))
+
+        vectors: dict[str, np.ndarray] = {}
+        vdb = None
+        try:
+            embeddings = np.concatenate(
+                [
+                    await rag.embedding_func(unique[i : i + _MAX_EMBEDDING_INPUTS])
+                    for i in range(0, len(unique), _MAX_EMBEDDING_INPUTS)
+                ]
+            )
+            storage = rag.entities_vdb if param.mode == "local" else rag.chunks_vdb
+            vdb = _PrecomputedVectorResults(
+                storage,
+                dict(zip(unique, await storage.query_many(unique, param.top_k, embeddings))),
+            )
+            vectors = dict(zip(unique, embeddings))
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(f"Batched retrieval failed, retrieving per question: {exc}")
+
+        semaphore = asyncio.Semaphore(settings.QUERY_BATCH_CONCURRENCY)
+
+        async def _one(question: str) -> dict[str, Any]:
+            async with semaphore:
+                try:
+                    embedding, cached = await self._semantic_lookup(
+                        rag, attempt_id, question, param, config, vectors.get(question)
+                    )
+                    if cached is not None:
+                        answer, contexts = cached["answer"], cached["contexts"]
+                        return {"answer": answer, "contexts": contexts, "error": None}
+                    contexts = self._pack(
+                        await self._aretrieve(rag, question, param, vdb), config
+                    )
+                    answer = await self._aanswer(rag, question, param, contexts)
+                    await self._semantic_store(
+                        attempt_id, question, param, config, embedding, answer, contexts
+                    )
+                    return {"answer": answer, "contexts": contexts, "error": None}
+                except Exception as exc:  # noqa: BLE001
+                    return {"answer": None, "contexts": [], "error": str(exc)}
+
+        results = await asyncio.gather(*[_one(question) for question in questions])
+        return [{"question": q, **result} for q, result in zip(questions, results)]
+
+    async def _aretrieve_shard(
+        self,
+        rag: GraphRAG,
+        target: dict[str, Any],
+        question: str,
+        param: QueryParam,
+        embedding: np.ndarray,
+    ) -> list[dict[str, Any]]:
+        storage = rag.entities_vdb if param.mode == "local" else rag.chunks_vdb
+        hits = (await storage.query_many([question], param.top_k, embedding[None, :]))[0]
+        vdb = _PrecomputedVectorResults(storage, {question: hits})
+        contexts = await self._aretrieve(rag, question, param, vdb)
+        meta = {"corpus_id": target["corpus_id"], "attempt_id": target["attempt_id"]}
+        return [{**context, "meta": {**context["meta"], **meta}} for context in contexts]
+
+    async def retrieve_and_answer_federated(
+        self,
+        targets: list[dict[str, Any]],
+        question: str,
+        top_k: int,
+        expand_graph: bool,
+    ) -> tuple[str, list[dict[str, Any]], dict[str, Any]]:
+        param = _query_param(top_k, expand_graph)
+        failed: list[dict[str, Any]] = []
+        with ExitStack() as stack:
+            rags: list[GraphRAG] = []
+            ready: list[dict[str, Any]] = []
+            for target in targets:
+                try:
+                    rag = stack.enter_context(
+                        self._rag(
+                            target["corpus_id"], target["attempt_id"], target.get("config") or {}
+                        )
+                    )
+                except Exception as exc:  # noqa: BLE001
+                    failed.append(_failed_shard(target, exc))
+                    continue
+                rags.append(rag)
+                ready.append(target)
+            if not rags:
+                raise RuntimeError(f"All {len(targets)} corpora failed: {failed[0]['error']}")
+            answer, contexts, meta = await self._afederated(rags, ready, question, top_k, param)
+        meta["failed_shards"] = failed + meta["failed_shards"]
+        return answer, contexts, meta
+
+    async def _afederated(
+        self,
+        rags: list[GraphRAG],
+        targets: list[dict[str, Any]],
+        question: str,
+        top_k: int,
+        param: QueryParam,
+    ) -> tuple[str, list[dict[str, Any]], dict[str, Any]]:
+        embedding = (await rags[0].embedding_func([question]))[0]
+        shards = await asyncio.gather(
+            *[
+                self._aretrieve_shard(rag, target, question, param, embedding)
+                for rag, target in zip(rags, targets)
+            ],
+            return_exceptions=True,
+        )
+        failed: list[dict[str, Any]] = []
+        merged: list[dict[str, Any]] = []
+        for target, shard in zip(targets, shards):
+            if isinstance(shard, Exception):
+                logger.warning(f"Federated query skipped attempt {target['attempt_id']}: {shard}")
+                failed.append(_failed_shard(target, shard))
+            elif isinstance(shard, BaseException):
+                raise shard
+            else:
+                merged.extend(shard)
+        if len(failed) == len(targets):
+            raise RuntimeError(f"All {len(targets)} corpora failed: {failed[0]['error']}")
+        contexts = self._pack(top_k_per_type(merged, top_k))
+        if contexts:
+            answer = await _make_model_func(settings.OPENAI_MODEL, self._openai)(
+                question,
+                system_prompt=self._system_prompt(param, contexts),
+            )
+        else:
+            answer = PROMPTS["fail_response"]
+        return answer, contexts, {"failed_shards": failed}
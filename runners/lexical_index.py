@@ -0,0 +1,111 @@
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+")
+_META_FILE = "meta.json"
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def build_lexical_index(chunks: dict[str, str], path: Path) -> dict[str, Any]:
+    path.mkdir(parents=True, exist_ok=True)
+    chunk_ids = sorted(chunks)
+    vocab: dict[str, int] = {}
+    term_ids: list[int] = []
+    doc_ids: list[int] = []
+    freqs: list[int] = []
+    doc_lens = np.zeros(len(chunk_ids), dtype=np.int32)
+
+    for doc_id, chunk_id in enumerate(chunk_ids):
+        tokens = tokenize(chunks[chunk_id])
+        doc_lens[doc_id] = len(tokens)
+        for term, count in Counter(tokens).items():
+            term_ids.append(vocab.setdefault(term, len(vocab)))
+            doc_ids.append(doc_id)
+            freqs.append(count)
+
+    terms = np.asarray(term_ids, dtype=np.int32)
+    order = np.argsort(terms, kind="stable")
+    offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(terms, minlength=len(vocab)), out=offsets[1:])
+
+    np.save(path / "postings_docs.npy", np.asarray(doc_ids, dtype=np.int32)[order])
+    np.save(path / "postings_freqs.npy", np.asarray(freqs, dtype=np.int32)[order])
+    np.save(path / "offsets.npy", offsets)
+    np.save(path / "doc_lens.npy", doc_lens)
+    meta = {
+        "chunk_ids": chunk_ids,
+        "vocab": vocab,
+        "avg_doc_len": float(doc_lens.mean()) if len(doc_lens) else 0.0,
+    }
+    (path / _META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+    return {"path": str(path), "chunks": len(chunk_ids), "terms": len(vocab)}
+
+
+class LexicalIndex:
+    def __init__(self, path: Path, k1: float = 1.2, b: float = 0.75) -> None:
+        meta = json.loads((path / _META_FILE).read_text(encoding="utf-8"))
+        self._chunk_ids: list[str] = meta["chunk_ids"]
+        self._vocab: dict[str, int] = meta["vocab"]
+        self._avg_doc_len = meta["avg_doc_len"] or 1.0
+        self._docs = np.load(path / "postings_docs.npy", mmap_mode="r")
+        self._freqs = np.load(path / "postings_freqs.npy", mmap_mode="r")
+        self._offsets = np.load(path / "offsets.npy", mmap_mode="r")
+        self._doc_lens = np.load(path / "doc_lens.npy", mmap_mode="r")
+        self._k1 = k1
+        self._b = b
+
+    @classmethod
+    def load(cls, path: Path) -> "LexicalIndex | None":
+        if not (path / _META_FILE).exists():
+            return None
+        return cls(path)
+
+    def search(self, query: str, top_k: int) -> list[dict[str, Any]]:
+        terms = set(tokenize(query))
+        total = len(self._chunk_ids)
+        if not terms or not total:
+            return []
+        scores = np.zeros(total, dtype=np.float32)
+        matched = np.zeros(total, dtype=np.int32)
+        norms = self._k1 * (1 - self._b + self._b * self._doc_lens / self._avg_doc_len)
+        for term in terms:
+            term_id = self._vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = int(self._offsets[term_id]), int(self._offsets[term_id + 1])
+            docs = np.asarray(self._docs[start:end])
+            freqs = np.asarray(self._freqs[start:end], dtype=np.float32)
+            idf = math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * freqs * (self._k1 + 1) / (freqs + norms[docs])
+            matched[docs] += 1
+
+        candidates = np.flatnonzero(scores)
+        if not len(candidates):
+            return []
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [
+            {
+                "id": self._chunk_ids[doc],
+                "score": float(scores[doc]),
+                "matched_terms": int(matched[doc]),
+                "query_terms": len(terms),
+            }
+            for doc in candidates
+        ]
+
+
+def is_decisive(hits: list[dict[str, Any]], ratio: float) -> bool:
+    if not hits or hits[0]["matched_terms"] < hits[0]["query_terms"]:
+        return False
+    return len(hits) == 1 or hits[0]["score"] >= ratio * hits[1]["score"]
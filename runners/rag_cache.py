@@ -0,0 +1,143 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Callable, Hashable, Iterator
+
+
+def config_hash(config: dict[str, Any] | None) -> str:
+    payload = json.dumps(config or {}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class RagCache:
+    def __init__(
+        self,
+        max_size: int,
+        idle_ttl_seconds: float,
+        close_func: Callable[[Any], None] | None = None,
+    ) -> None:
+        self._max_size = max(1, max_size)
+        self._idle_ttl = idle_ttl_seconds
+        self._close_func = close_func
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._in_use: dict[int, int] = {}
+        self._retired: dict[int, Any] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def acquire(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            expired = self._pop_expired(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], now)
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = entry[0]
+                self._in_use[id(value)] = self._in_use.get(id(value), 0) + 1
+            else:
+                self.misses += 1
+                value = None
+        self._close_all(expired)
+        if value is not None:
+            return value
+
+        value = factory()
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                duplicate, value = value, existing[0]
+            else:
+                duplicate = None
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            self._in_use[id(value)] = self._in_use.get(id(value), 0) + 1
+            overflow = []
+            while len(self._entries) > self._max_size:
+                _, (old_value, _) = self._entries.popitem(last=False)
+                overflow.append(old_value)
+                self.evictions += 1
+        if duplicate is not None:
+            overflow.append(duplicate)
+        self._close_all(overflow)
+        return value
+
+    def release(self, value: Any) -> None:
+        with self._lock:
+            count = self._in_use.get(id(value), 0) - 1
+            if count > 0:
+                self._in_use[id(value)] = count
+                return
+            self._in_use.pop(id(value), None)
+            retired = self._retired.pop(id(value), None)
+        if retired is not None:
+            self._close_all([retired])
+
+    @contextmanager
+    def lease(self, key: Hashable, factory: Callable[[], Any]) -> Iterator[Any]:
+        value = self.acquire(key, factory)
+        try:
+            yield value
+        finally:
+            self.release(value)
+
+    def evict(self, predicate: Callable[[Hashable], bool]) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            values = [self._entries.pop(key)[0] for key in keys]
+            self.evictions += len(values)
+        self._close_all(values)
+        return len(values)
+
+    def clear(self) -> None:
+        with self._lock:
+            values = [value for value, _ in self._entries.values()]
+            self._entries.clear()
+        self._close_all(values)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self._max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "in_use": sum(self._in_use.values()),
+                "pending_close": len(self._retired),
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+    def _pop_expired(self, now: float) -> list[Any]:
+        if self._idle_ttl <= 0:
+            return []
+        expired_keys = [
+            key for key, (_, last_used) in self._entries.items()
+            if now - last_used > self._idle_ttl
+        ]
+        values = [self._entries.pop(key)[0] for key in expired_keys]
+        self.evictions += len(values)
+        return values
+
+    def _close_all(self, values: list[Any]) -> None:
+        with self._lock:
+            idle = []
+            for value in values:
+                if self._in_use.get(id(value), 0) > 0:
+                    self._retired[id(value)] = value
+                else:
+                    idle.append(value)
+        if self._close_func is None:
+            return
+        for value in idle:
+            try:
+                self._close_func(value)
+            except Exception:  # noqa: BLE001
+                pass
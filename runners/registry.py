@@ -1,7 +1,11 @@
+from runners.base import BaseRagRunner
 from runners.graph_rag_runner import GraphRagRunner
+from services.openai_client import OpenAIClient
 
+RUNNER_TYPES = ("graph",)
 
-def get_runner(runner_type: str):
+
+def create_runner(runner_type: str, openai_client: OpenAIClient) -> BaseRagRunner:
     if runner_type != "graph":
         raise ValueError(f"Unknown runner_type: {runner_type}")
-    return GraphRagRunner()
+    return GraphRagRunner(openai_client)
@@ -0,0 +1,185 @@
+import asyncio
+import base64
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any
+
+import numpy as np
+
+from services.redis_client import get_async_redis
+
+
+def _encode_vector(vector: np.ndarray) -> str:
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def _decode_vector(raw: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(raw), dtype=np.float32)
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+@dataclass
+class _Partition:
+    ids: list[str] = field(default_factory=list)
+    matrix: np.ndarray | None = None
+    loaded_at: float = 0.0
+
+    def append(self, entry_id: str, vector: np.ndarray) -> None:
+        row = vector.reshape(1, -1)
+        self.matrix = row if self.matrix is None else np.vstack([self.matrix, row])
+        self.ids.append(entry_id)
+
+    def drop_oldest(self, count: int) -> list[str]:
+        dropped, self.ids = self.ids[:count], self.ids[count:]
+        if self.matrix is not None:
+            self.matrix = self.matrix[count:] if self.ids else None
+        return dropped
+
+
+class SemanticAnswerCache:
+    def __init__(
+        self,
+        redis_url: str,
+        threshold: float,
+        max_entries: int,
+        refresh_seconds: float = 300,
+        max_connections: int | None = None,
+    ) -> None:
+        self._redis_url = redis_url
+        self._max_connections = max_connections
+        self._threshold = threshold
+        self._max_entries = max(1, max_entries)
+        self._refresh_seconds = refresh_seconds
+        self._partitions: dict[tuple[str, str, int, int], _Partition] = {}
+        self._locks: dict[tuple[str, str, int, int], asyncio.Lock] = {}
+        # evict_attempt() is called from worker threads.
+        self._mutex = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def _client(self):
+        return get_async_redis(self._redis_url, max_connections=self._max_connections)
+
+    @staticmethod
+    def _keys(
+        attempt_id: str, mode: str, top_k: int, token_budget: int
+    ) -> tuple[str, str, str]:
+        base = f"kv:{attempt_id}:semantic_cache:{mode}:{top_k}:{token_budget}"
+        return f"{base}:vectors", f"{base}:entries", f"kv:{attempt_id}:__keys"
+
+    def _fresh(self, key: tuple[str, str, int, int]) -> _Partition | None:
+        with self._mutex:
+            partition = self._partitions.get(key)
+        if partition is not None and time.monotonic() - partition.loaded_at < self._refresh_seconds:
+            return partition
+        return None
+
+    async def _partition(
+        self, attempt_id: str, mode: str, top_k: int, token_budget: int
+    ) -> _Partition:
+        key = (attempt_id, mode, top_k, token_budget)
+        partition = self._fresh(key)
+        if partition is not None:
+            return partition
+        with self._mutex:
+            lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            partition = self._fresh(key)
+            if partition is not None:
+                return partition
+            vectors_key, _, _ = self._keys(*key)
+            raw = await self._client.hgetall(vectors_key)
+            partition = _Partition(loaded_at=time.monotonic())
+            for entry_id, encoded in sorted(raw.items(), key=lambda item: item[0]):
+                partition.append(entry_id, _decode_vector(encoded))
+            with self._mutex:
+                self._partitions[key] = partition
+            return partition
+
+    async def lookup(
+        self,
+        attempt_id: str,
+        mode: str,
+        top_k: int,
+        token_budget: int,
+        embedding: np.ndarray,
+        threshold: float | None = None,
+    ) -> dict[str, Any] | None:
+        partition = await self._partition(attempt_id, mode, top_k, token_budget)
+        if partition.matrix is None:
+            self.misses += 1
+            return None
+        scores = partition.matrix @ _normalize(embedding)
+        best = int(np.argmax(scores))
+        if float(scores[best]) < (self._threshold if threshold is None else threshold):
+            self.misses += 1
+            return None
+        _, entries_key, _ = self._keys(attempt_id, mode, top_k, token_budget)
+        raw = await self._client.hget(entries_key, partition.ids[best])
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry = json.loads(raw)
+        entry["similarity"] = float(scores[best])
+        return entry
+
+    async def store(
+        self,
+        attempt_id: str,
+        mode: str,
+        top_k: int,
+        token_budget: int,
+        question: str,
+        embedding: np.ndarray,
+        answer: str,
+        contexts: list[dict[str, Any]],
+    ) -> None:
+        partition = await self._partition(attempt_id, mode, top_k, token_budget)
+        vectors_key, entries_key, keys_set = self._keys(attempt_id, mode, top_k, token_budget)
+        vector = _normalize(embedding)
+        entry_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        entry = {"question": question, "answer": answer, "contexts": contexts}
+
+        partition.append(entry_id, vector)
+        dropped = partition.drop_oldest(max(0, len(partition.ids) - self._max_entries))
+
+        pipe = self._client.pipeline()
+        pipe.hset(vectors_key, entry_id, _encode_vector(vector))
+        pipe.hset(entries_key, entry_id, json.dumps(entry))
+        if dropped:
+            pipe.hdel(vectors_key, *dropped)
+            pipe.hdel(entries_key, *dropped)
+        pipe.sadd(keys_set, vectors_key, entries_key)
+        await pipe.execute()
+
+    def evict_attempt(self, attempt_id: str) -> None:
+        with self._mutex:
+            for key in [key for key in self._partitions if key[0] == attempt_id]:
+                self._partitions.pop(key, None)
+                self._locks.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        with self._mutex:
+            partitions = list(self._partitions.values())
+        total = self.hits + self.misses
+        return {
+            "partitions": len(partitions),
+            "entries": sum(len(p.ids) for p in partitions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+    async def aclose(self) -> None:
+        with self._mutex:
+            self._partitions.clear()
@@ -0,0 +1,72 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import redis
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from _storage.codec import KVCodec  # noqa: E402
+from config import get_settings  # noqa: E402
+
+CANDIDATES = [
+    ("json", 0),
+    ("json", 4096),
+    ("msgpack", 0),
+    ("msgpack", 4096),
+    ("msgpack", 1),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare KV codecs on an attempt's Redis values")
+    parser.add_argument("attempt_id")
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    client = redis.Redis.from_url(args.redis_url or get_settings().REDIS_URL)
+    keys = sorted(client.smembers(f"kv:{args.attempt_id}:__keys"))
+    if args.limit:
+        keys = keys[: args.limit]
+    reader = KVCodec()
+    values = []
+    for i in range(0, len(keys), 500):
+        for raw in client.mget(keys[i : i + 500]):
+            if raw is None:
+                continue
+            try:
+                values.append(reader.decode(raw))
+            except ValueError:
+                continue
+    if not values:
+        print(f"No decodable values for attempt {args.attempt_id}")
+        return
+
+    print(f"{len(values)} values from {len(keys)} keys")
+    print(f"{'codec':<10} {'zstd >=':>8} {'bytes':>14} {'ratio':>7} {'encode ms':>10} {'decode ms':>10}")
+    baseline = None
+    for fmt, threshold in CANDIDATES:
+        codec = KVCodec(fmt, compress_min_bytes=threshold)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            encoded = [codec.encode(value) for value in values]
+        encode_ms = (time.perf_counter() - start) * 1000 / args.repeat
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for raw in encoded:
+                codec.decode(raw)
+        decode_ms = (time.perf_counter() - start) * 1000 / args.repeat
+        size = sum(len(raw) for raw in encoded)
+        baseline = baseline or size
+        label = str(threshold) if threshold else "off"
+        print(
+            f"{codec.format:<10} {label:>8} {size:>14,} {size / baseline:>7.2f} "
+            f"{encode_ms:>10.1f} {decode_ms:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
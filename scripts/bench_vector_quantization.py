@@ -0,0 +1,94 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import chromadb
+import hnswlib
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from _storage.vdb_quantized import dequantize, quantize, scan_l2  # noqa: E402
+from config import get_settings  # noqa: E402
+
+
+def load_vectors(corpus_id: str, attempt_id: str, namespace: str) -> np.ndarray:
+    settings = get_settings()
+    path = (
+        Path(settings.DATA_DIR)
+        / "corpora"
+        / corpus_id
+        / "attempts"
+        / attempt_id
+        / "nanographrag"
+        / "vectors"
+        / namespace
+        / "vectors.f32"
+    )
+    if path.exists():
+        return np.fromfile(path, dtype=np.float32)
+    client = chromadb.HttpClient(host=settings.CHROMA_HOST, port=settings.CHROMA_PORT)
+    collection = client.get_collection(f"col__{attempt_id}__{namespace}")
+    batches = []
+    for offset in range(0, collection.count(), 1000):
+        result = collection.get(include=["embeddings"], limit=1000, offset=offset)
+        batches.append(np.asarray(result["embeddings"], dtype=np.float32))
+    return np.concatenate(batches) if batches else np.zeros(0, dtype=np.float32)
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(found, truth)]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare vector storage modes on an attempt's embeddings")
+    parser.add_argument("corpus_id")
+    parser.add_argument("attempt_id")
+    parser.add_argument("--namespace", default="entities")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.corpus_id, args.attempt_id, args.namespace).reshape(-1, args.dim)
+    if len(vectors) <= args.top_k:
+        print(f"Not enough vectors for attempt {args.attempt_id} ({len(vectors)})")
+        return
+    rng = np.random.default_rng(0)
+    picks = rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)
+    queries = vectors[picks] + rng.normal(0, 0.01, (len(picks), args.dim)).astype(np.float32)
+    k = args.top_k
+    ones = np.ones(len(vectors), dtype=np.float32)
+    truth, _ = scan_l2(queries, vectors, ones, (vectors * vectors).sum(axis=1), k)
+
+    print(f"{len(vectors)} vectors x {args.dim}, {len(queries)} queries, top {k}")
+    print(f"{'mode':<10} {'bytes':>14} {'ratio':>7} {'recall':>7} {'ms/query':>9}")
+
+    index = hnswlib.Index(space="l2", dim=args.dim)
+    index.init_index(max_elements=len(vectors), ef_construction=200, M=16)
+    index.add_items(vectors, np.arange(len(vectors)))
+    index.set_ef(max(64, k))
+    start = time.perf_counter()
+    labels = np.concatenate([index.knn_query(query[None, :], k=k)[0] for query in queries])
+    elapsed = (time.perf_counter() - start) * 1000 / len(queries)
+    print(f"{'hnsw':<10} {vectors.nbytes:>14,} {1.0:>7.2f} {recall(labels, truth):>7.3f} {elapsed:>9.3f}")
+
+    for dtype in ("float16", "int8"):
+        codes, scales = quantize(vectors, dtype)
+        restored = dequantize(codes, scales)
+        norms = (restored * restored).sum(axis=1)
+        start = time.perf_counter()
+        labels = np.concatenate(
+            [scan_l2(query[None, :], codes, scales, norms, k)[0] for query in queries]
+        )
+        elapsed = (time.perf_counter() - start) * 1000 / len(queries)
+        size = codes.nbytes + scales.nbytes + norms.nbytes
+        print(
+            f"{dtype:<10} {size:>14,} {size / vectors.nbytes:>7.2f} "
+            f"{recall(labels, truth):>7.3f} {elapsed:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
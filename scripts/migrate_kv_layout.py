@@ -0,0 +1,73 @@
+import argparse
+import sys
+from pathlib import Path
+
+import redis
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from config import get_settings  # noqa: E402
+from db.models import Attempt  # noqa: E402
+from db.session import SessionLocal  # noqa: E402
+
+NAMESPACES = ["full_docs", "text_chunks", "llm_response_cache", "community_reports"]
+BATCH = 500
+
+
+def migrate_namespace(client: redis.Redis, attempt_id: str, namespace: str) -> int:
+    keys_set = f"kv:{attempt_id}:__keys"
+    hash_key = f"kv:{attempt_id}:{namespace}"
+    prefix = f"kv:{attempt_id}:{namespace}:".encode("utf-8")
+    keys = [key for key in client.sscan_iter(keys_set, count=1000) if key.startswith(prefix)]
+    moved = 0
+    for i in range(0, len(keys), BATCH):
+        batch = keys[i : i + BATCH]
+        values = client.mget(batch)
+        mapping = {
+            key[len(prefix) :]: value for key, value in zip(batch, values) if value is not None
+        }
+        pipe = client.pipeline(transaction=False)
+        if mapping:
+            pipe.hset(hash_key, mapping=mapping)
+            pipe.sadd(keys_set, hash_key)
+        pipe.unlink(*batch)
+        pipe.srem(keys_set, *batch)
+        pipe.execute()
+        moved += len(mapping)
+    return moved
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Move an attempt's Redis KV entries into one hash per namespace"
+    )
+    parser.add_argument("attempt_id")
+    parser.add_argument("--namespaces", nargs="*", default=NAMESPACES)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        attempt = db.query(Attempt).filter(Attempt.attempt_id == args.attempt_id).first()
+        if attempt is None:
+            print(f"Attempt {args.attempt_id} not found")
+            return
+        if (attempt.config or {}).get("kv_layout") == "hash":
+            print(f"Attempt {args.attempt_id} already uses the hash layout")
+            return
+
+        client = redis.Redis.from_url(get_settings().REDIS_URL)
+        for namespace in args.namespaces:
+            moved = migrate_namespace(client, args.attempt_id, namespace)
+            print(f"{namespace}: moved {moved} entries")
+
+        attempt.config = {**(attempt.config or {}), "kv_layout": "hash"}
+        if attempt.artifacts:
+            attempt.artifacts = {**attempt.artifacts, "kv_layout": "hash"}
+        db.commit()
+        print(f"Attempt {args.attempt_id} now uses the hash layout")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
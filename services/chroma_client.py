@@ -1,12 +1,25 @@
 from typing import Any
 
+from threading import Lock
+
 import chromadb
 from chromadb.errors import NotFoundError
 
 
 class ChromaClient:
     def __init__(self, host: str, port: int) -> None:
-        self.client = chromadb.HttpClient(host=host, port=port)
+        self._host = host
+        self._port = port
+        self._client: Any = None
+        self._lock = Lock()
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = chromadb.HttpClient(host=self._host, port=self._port)
+        return self._client
 
     def heartbeat(self) -> bool:
         return self.client.heartbeat() is not None
@@ -17,6 +30,13 @@ class ChromaClient:
         except NotFoundError:
             return self.client.create_collection(name)
 
+    def delete_where(self, name: str, where: dict[str, Any]) -> None:
+        try:
+            collection = self.client.get_collection(name)
+        except NotFoundError:
+            return
+        collection.delete(where=where)
+
     def delete_collection(self, name: str) -> None:
         try:
             self.client.delete_collection(name)
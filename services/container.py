@@ -0,0 +1,52 @@
+from typing import Any
+
+from config import Settings
+from runners.base import BaseRagRunner
+from runners.registry import RUNNER_TYPES, create_runner
+from services.chroma_client import ChromaClient
+from services.neo4j_client import Neo4jClient
+from services.openai_client import OpenAIClient
+from services.redis_client import RedisClient
+
+
+class ServiceContainer:
+    def __init__(self, settings: Settings) -> None:
+        self.openai = OpenAIClient(
+            api_key=settings.OPENAI_API_KEY,
+            model=settings.OPENAI_MODEL,
+            embed_model=settings.OPENAI_EMBED_MODEL,
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+        )
+        self.chroma = ChromaClient(settings.CHROMA_HOST, settings.CHROMA_PORT)
+        self.neo4j = Neo4jClient(
+            settings.NEO4J_URI,
+            settings.NEO4J_USER,
+            settings.NEO4J_PASSWORD,
+            max_connection_pool_size=settings.NEO4J_MAX_POOL_SIZE,
+            write_batch_size=settings.NEO4J_WRITE_BATCH_SIZE,
+            write_concurrency=settings.NEO4J_WRITE_CONCURRENCY,
+            delete_batch_size=settings.NEO4J_DELETE_BATCH_SIZE,
+        )
+        self.redis = RedisClient(settings.REDIS_URL, max_connections=settings.REDIS_MAX_CONNECTIONS)
+        self.runners: dict[str, BaseRagRunner] = {
+            runner_type: create_runner(runner_type, self.openai) for runner_type in RUNNER_TYPES
+        }
+
+    def runner(self, runner_type: str) -> BaseRagRunner:
+        runner = self.runners.get(runner_type)
+        if runner is None:
+            raise ValueError(f"Unknown runner_type: {runner_type}")
+        return runner
+
+    def stats(self) -> dict[str, Any]:
+        stats: dict[str, Any] = {}
+        for runner in self.runners.values():
+            stats.update(runner.stats())
+        return stats
+
+    async def aclose(self) -> None:
+        for runner in self.runners.values():
+            await runner.aclose()
+        self.neo4j.close()
+        self.redis.close()
+        await self.openai.aclose()
@@ -1,14 +1,94 @@
-from typing import Any
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from threading import Lock
+from typing import Any, Callable
+from weakref import WeakKeyDictionary
 
-from neo4j import GraphDatabase
+from neo4j import AsyncDriver, AsyncGraphDatabase, Driver, GraphDatabase
+
+
+def _pool_options(max_pool_size: int) -> dict[str, Any]:
+    return {
+        "max_connection_pool_size": max_pool_size,
+        "connection_acquisition_timeout": 30.0,
+        "max_connection_lifetime": 3600,
+        "liveness_check_timeout": 300,
+        "keep_alive": True,
+    }
+
+
+@lru_cache
+def get_neo4j_driver(uri: str, user: str, password: str, max_pool_size: int = 50) -> Driver:
+    return GraphDatabase.driver(uri, auth=(user, password), **_pool_options(max_pool_size))
+
+
+_async_drivers_lock = Lock()
+_async_drivers: "WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple, AsyncDriver]]" = (
+    WeakKeyDictionary()
+)
+
+
+def get_async_neo4j_driver(
+    uri: str, auth: tuple[str, str], max_pool_size: int = 50
+) -> AsyncDriver:
+    loop = asyncio.get_running_loop()
+    with _async_drivers_lock:
+        drivers = _async_drivers.setdefault(loop, {})
+        driver = drivers.get((uri, auth))
+        if driver is None:
+            driver = AsyncGraphDatabase.driver(uri, auth=auth, **_pool_options(max_pool_size))
+            drivers[(uri, auth)] = driver
+        return driver
+
+
+async def close_async_neo4j() -> None:
+    with _async_drivers_lock:
+        drivers = _async_drivers.pop(asyncio.get_running_loop(), {})
+    for driver in drivers.values():
+        await driver.close()
+
+
+def _run_write(tx, query: str, rows: list[dict[str, Any]], params: dict[str, Any]) -> None:
+    tx.run(query, rows=rows, **params).consume()
 
 
 class Neo4jClient:
-    def __init__(self, uri: str, user: str, password: str) -> None:
-        self._driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(
+        self,
+        uri: str,
+        user: str,
+        password: str,
+        max_connection_pool_size: int = 100,
+        write_batch_size: int = 1000,
+        write_concurrency: int = 1,
+        delete_batch_size: int = 10_000,
+    ) -> None:
+        self._driver = get_neo4j_driver(uri, user, password, max_connection_pool_size)
+        self._write_batch_size = max(1, write_batch_size)
+        self._write_concurrency = max(1, write_concurrency)
+        self._delete_batch_size = max(1, delete_batch_size)
 
     def close(self) -> None:
         self._driver.close()
+        get_neo4j_driver.cache_clear()
+
+    def _write_batches(self, query: str, rows: list[dict[str, Any]], **params: Any) -> None:
+        batches = [
+            rows[i : i + self._write_batch_size]
+            for i in range(0, len(rows), self._write_batch_size)
+        ]
+
+        def _write(batch: list[dict[str, Any]]) -> None:
+            with self._driver.session() as session:
+                session.execute_write(_run_write, query, batch, params)
+
+        if self._write_concurrency > 1 and len(batches) > 1:
+            with ThreadPoolExecutor(min(self._write_concurrency, len(batches))) as pool:
+                list(pool.map(_write, batches))
+        else:
+            for batch in batches:
+                _write(batch)
 
     def ping(self) -> bool:
         with self._driver.session() as session:
@@ -25,25 +105,24 @@ class Neo4jClient:
             )
 
     def upsert_graph(self, entities: list[dict[str, Any]], relations: list[dict[str, Any]], corpus_id: str, attempt_id: str) -> None:
-        with self._driver.session() as session:
-            session.run(
-                "UNWIND $entities AS ent "
-                "MERGE (e:Entity {id: ent.id, attempt_id: $attempt_id}) "
-                "SET e.name = ent.name, e.corpus_id = $corpus_id",
-                entities=entities,
-                attempt_id=attempt_id,
-                corpus_id=corpus_id,
-            )
-            session.run(
-                "UNWIND $relations AS rel "
-                "MATCH (s:Entity {id: rel.source, attempt_id: $attempt_id}) "
-                "MATCH (t:Entity {id: rel.target, attempt_id: $attempt_id}) "
-                "MERGE (s)-[r:REL {type: rel.type, attempt_id: $attempt_id}]->(t) "
-                "SET r.corpus_id = $corpus_id",
-                relations=relations,
-                attempt_id=attempt_id,
-                corpus_id=corpus_id,
-            )
+        self._write_batches(
+            "UNWIND $rows AS ent "
+            "MERGE (e:Entity {id: ent.id, attempt_id: $attempt_id}) "
+            "SET e.name = ent.name, e.corpus_id = $corpus_id",
+            entities,
+            attempt_id=attempt_id,
+            corpus_id=corpus_id,
+        )
+        self._write_batches(
+            "UNWIND $rows AS rel "
+            "MATCH (s:Entity {id: rel.source, attempt_id: $attempt_id}) "
+            "MATCH (t:Entity {id: rel.target, attempt_id: $attempt_id}) "
+            "MERGE (s)-[r:REL {type: rel.type, attempt_id: $attempt_id}]->(t) "
+            "SET r.corpus_id = $corpus_id",
+            relations,
+            attempt_id=attempt_id,
+            corpus_id=corpus_id,
+        )
 
     def get_neighbors(self, node_ids: list[str], attempt_id: str) -> list[str]:
         if not node_ids:
@@ -59,15 +138,61 @@ class Neo4jClient:
             )
             return [record["id"] for record in result]
 
-    def delete_attempt(self, attempt_id: str) -> None:
+    def _delete_in_batches(
+        self,
+        pattern: str,
+        progress: Callable[[int], None] | None = None,
+        **params: Any,
+    ) -> int:
+        relationships = (
+            f"MATCH {pattern}-[r]-() WITH DISTINCT r LIMIT $limit "
+            "CALL { WITH r DELETE r } IN TRANSACTIONS OF $batch_size ROWS"
+        )
+        nodes = (
+            f"MATCH {pattern} WITH n LIMIT $limit "
+            "CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF $batch_size ROWS"
+        )
+        batch_size = self._delete_batch_size
+        deleted = 0
         with self._driver.session() as session:
-            session.run(
-                "MATCH (n {attempt_id: $attempt_id}) DETACH DELETE n",
-                attempt_id=attempt_id,
-            )
+            for query, counter in (
+                (relationships, "relationships_deleted"),
+                (nodes, "nodes_deleted"),
+            ):
+                while True:
+                    summary = session.run(
+                        query, limit=batch_size * 10, batch_size=batch_size, **params
+                    ).consume()
+                    count = getattr(summary.counters, counter)
+                    if not count:
+                        break
+                    if counter == "nodes_deleted":
+                        deleted += count
+                        if progress is not None:
+                            progress(deleted)
+        return deleted
 
-    def delete_namespace(self, namespace: str) -> None:
+    def delete_attempt(
+        self, attempt_id: str, progress: Callable[[int], None] | None = None
+    ) -> int:
+        return self._delete_in_batches(
+            "(n {attempt_id: $attempt_id})", progress, attempt_id=attempt_id
+        )
+
+    def delete_namespace(
+        self, namespace: str, progress: Callable[[int], None] | None = None
+    ) -> int:
+        deleted = self._delete_in_batches(f"(n:`{namespace}`)", progress)
         with self._driver.session() as session:
-            session.run(
-                f"MATCH (n:`{namespace}`) DETACH DELETE n"
-            )
+            for plural, kind in (("CONSTRAINTS", "CONSTRAINT"), ("INDEXES", "INDEX")):
+                names = [
+                    record["name"]
+                    for record in session.run(
+                        f"SHOW {plural} YIELD name, labelsOrTypes "
+                        "WHERE $namespace IN labelsOrTypes RETURN name",
+                        namespace=namespace,
+                    )
+                ]
+                for name in names:
+                    session.run(f"DROP {kind} `{name}` IF EXISTS")
+        return deleted
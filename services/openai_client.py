@@ -1,16 +1,39 @@
 import json
 from typing import Any
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 
 class OpenAIClient:
-    def __init__(self, api_key: str, model: str, embed_model: str) -> None:
-        self.client = OpenAI(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        embed_model: str,
+        max_connections: int | None = None,
+    ) -> None:
+        http_client = async_http_client = None
+        if max_connections:
+            limits = httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            )
+            http_client = DefaultHttpxClient(limits=limits)
+            async_http_client = DefaultAsyncHttpxClient(limits=limits)
+        self.client = OpenAI(api_key=api_key, http_client=http_client)
+        self.async_client = AsyncOpenAI(api_key=api_key, http_client=async_http_client)
         self.model = model
         self.embed_model = embed_model
 
+    def close(self) -> None:
+        self.client.close()
+
+    async def aclose(self) -> None:
+        await self.async_client.close()
+        self.client.close()
+
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=8))
     def embed_texts(self, texts: list[str]) -> list[list[float]]:
         response = self.client.embeddings.create(model=self.embed_model, input=texts)
@@ -1,12 +1,121 @@
+import asyncio
 import json
-from typing import Any
+from threading import Lock
+from typing import Any, Callable
+from weakref import WeakKeyDictionary
 
 import redis
+from redis import asyncio as aioredis
+
+_async_clients_lock = Lock()
+_async_clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple[str, bool, int], aioredis.Redis]]" = (
+    WeakKeyDictionary()
+)
+
+
+def get_async_redis(
+    url: str, decode_responses: bool = True, max_connections: int | None = None
+) -> aioredis.Redis:
+    loop = asyncio.get_running_loop()
+    key = (url, decode_responses, max_connections or 50)
+    with _async_clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            pool = aioredis.BlockingConnectionPool.from_url(
+                url, decode_responses=decode_responses, max_connections=key[2]
+            )
+            client = aioredis.Redis(connection_pool=pool)
+            clients[key] = client
+        return client
+
+
+async def close_async_redis() -> None:
+    with _async_clients_lock:
+        clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose(close_connection_pool=True)
+
+
+_UNLINK_BATCH = 1000
+
+
+async def aunlink_tracked_keys(
+    client: aioredis.Redis,
+    keys_set: str,
+    prefix: str | None = None,
+    batch_size: int = _UNLINK_BATCH,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    match = f"{prefix}*" if prefix else None
+    deleted = 0
+    batch: list[str] = []
+    async for key in client.sscan_iter(keys_set, match=match, count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            deleted += await _aunlink_batch(client, keys_set, batch)
+            batch = []
+            if progress is not None:
+                progress(deleted)
+    if batch:
+        deleted += await _aunlink_batch(client, keys_set, batch)
+    if prefix is None:
+        await client.unlink(keys_set)
+    if progress is not None:
+        progress(deleted)
+    return deleted
+
+
+async def _aunlink_batch(client: aioredis.Redis, keys_set: str, keys: list[str]) -> int:
+    pipe = client.pipeline(transaction=False)
+    pipe.unlink(*keys)
+    pipe.srem(keys_set, *keys)
+    await pipe.execute()
+    return len(keys)
+
+
+def unlink_tracked_keys(
+    client: redis.Redis,
+    keys_set: str,
+    prefix: str | None = None,
+    batch_size: int = _UNLINK_BATCH,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    match = f"{prefix}*" if prefix else None
+    deleted = 0
+    batch: list[str] = []
+    for key in client.sscan_iter(keys_set, match=match, count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            deleted += _unlink_batch(client, keys_set, batch)
+            batch = []
+            if progress is not None:
+                progress(deleted)
+    if batch:
+        deleted += _unlink_batch(client, keys_set, batch)
+    if prefix is None:
+        client.unlink(keys_set)
+    if progress is not None:
+        progress(deleted)
+    return deleted
+
+
+def _unlink_batch(client: redis.Redis, keys_set: str, keys: list[str]) -> int:
+    pipe = client.pipeline(transaction=False)
+    pipe.unlink(*keys)
+    pipe.srem(keys_set, *keys)
+    pipe.execute()
+    return len(keys)
 
 
 class RedisClient:
-    def __init__(self, url: str) -> None:
-        self.client = redis.Redis.from_url(url, decode_responses=True)
+    def __init__(self, url: str, max_connections: int | None = None) -> None:
+        self.client = redis.Redis.from_url(
+            url, decode_responses=True, max_connections=max_connections
+        )
+
+    def close(self) -> None:
+        self.client.close()
 
     def ping(self) -> bool:
         return self.client.ping()
@@ -35,9 +144,7 @@ class RedisClient:
         except json.JSONDecodeError:
             return None
 
-    def delete_attempt_keys(self, attempt_id: str) -> None:
-        keyset = f"kv:{attempt_id}:__keys"
-        keys = self.client.smembers(keyset)
-        if keys:
-            self.client.delete(*list(keys))
-        self.client.delete(keyset)
+    def delete_attempt_keys(
+        self, attempt_id: str, progress: Callable[[int], None] | None = None
+    ) -> int:
+        return unlink_tracked_keys(self.client, f"kv:{attempt_id}:__keys", progress=progress)
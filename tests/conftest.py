@@ -0,0 +1,8 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("NEO4J_PASSWORD", "test")
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from _storage import codec
+from _storage.codec import JSON, JSON_ZSTD, MSGPACK, MSGPACK_ZSTD, KVCodec
+
+_VALUE = {"content": "chunk text " * 200, "tokens": 1200, "chunk_order_index": 3}
+
+
+def test_json_roundtrip_uses_json_marker():
+    kv = KVCodec("json", compress_min_bytes=0)
+    raw = kv.encode(_VALUE)
+    assert raw[0] == JSON
+    assert kv.decode(raw) == _VALUE
+    assert kv.decode(raw.decode("utf-8")) == _VALUE
+
+
+def test_legacy_json_without_marker_is_read():
+    kv = KVCodec("json")
+    assert kv.decode(json.dumps(_VALUE)) == _VALUE
+    assert kv.decode(json.dumps(_VALUE).encode("utf-8")) == _VALUE
+
+
+def test_empty_and_invalid_values_raise_value_error():
+    kv = KVCodec("json")
+    with pytest.raises(ValueError):
+        kv.decode(b"")
+    with pytest.raises(ValueError):
+        kv.decode(bytes([JSON]) + b"{not json")
+
+
+def test_msgpack_without_library_falls_back_to_json(monkeypatch):
+    monkeypatch.setattr(codec, "msgpack", None)
+    kv = KVCodec("msgpack", compress_min_bytes=0)
+    assert kv.format == "json"
+    assert kv.encode(_VALUE)[0] == JSON
+    with pytest.raises(ValueError):
+        kv.decode(bytes([MSGPACK]) + b"\x80")
+
+
+def test_msgpack_roundtrip():
+    pytest.importorskip("msgpack")
+    kv = KVCodec("msgpack", compress_min_bytes=0)
+    raw = kv.encode(_VALUE)
+    assert raw[0] == MSGPACK
+    assert kv.decode(raw) == _VALUE
+
+
+@pytest.mark.parametrize("format, marker", [("json", JSON_ZSTD), ("msgpack", MSGPACK_ZSTD)])
+def test_zstd_roundtrip_above_threshold(format, marker):
+    pytest.importorskip("zstandard")
+    if format == "msgpack":
+        pytest.importorskip("msgpack")
+    kv = KVCodec(format, compress_min_bytes=64)
+    raw = kv.encode(_VALUE)
+    assert raw[0] == marker
+    assert kv.decode(raw) == _VALUE
+    small = kv.encode({"small": 1})
+    assert small[0] in (JSON, MSGPACK)
+    assert kv.decode(small) == {"small": 1}
+
+
+def test_corrupt_zstd_payload_raises_value_error():
+    pytest.importorskip("zstandard")
+    kv = KVCodec("json", compress_min_bytes=64)
+    raw = kv.encode(_VALUE)
+    with pytest.raises(ValueError, match="Corrupt compressed value"):
+        kv.decode(raw[:1] + b"\x00" + raw[2:40])
+
+
+def test_compressed_value_without_zstandard_raises_value_error():
+    kv = KVCodec("json")
+    kv._decompressor = None
+    with pytest.raises(ValueError, match="zstandard is required"):
+        kv.decode(bytes([JSON_ZSTD]) + b"\x28\xb5\x2f\xfd")
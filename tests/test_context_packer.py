@@ -0,0 +1,61 @@
+import pytest
+import tiktoken
+
+from runners import context_packer
+from runners.context_packer import ContextPacker, _clean_cut
+
+_BYTES = tiktoken.Encoding(
+    name="bytes",
+    pat_str=r"[\s\S]",
+    mergeable_ranks={bytes([i]): i for i in range(256)},
+    special_tokens={},
+)
+
+
+@pytest.fixture(autouse=True)
+def _byte_encoding(monkeypatch):
+    monkeypatch.setattr(context_packer, "_encoding", lambda model: _BYTES)
+
+
+def _chunk(text: str, order: int, score: float = 1.0) -> dict:
+    return {
+        "text": text,
+        "score": score,
+        "meta": {"type": "chunk", "full_doc_id": "doc", "chunk_order_index": order},
+    }
+
+
+def test_drops_duplicates_and_items_over_budget():
+    packer = ContextPacker("test", default_budget=10)
+    contexts = [
+        {"text": "alpha beta", "score": 0.9, "meta": {}},
+        {"text": "ALPHA   beta", "score": 0.8, "meta": {}},
+        {"text": "gamma", "score": 0.7, "meta": {}},
+    ]
+    packed, report = packer.pack(contexts)
+    assert [c["text"] for c in packed] == ["alpha beta"]
+    assert report["duplicates"] == 1
+    assert report["dropped_items"] == 1
+    assert report["dropped_tokens"] == 5
+    assert packer.stats()["calls"] == 1
+
+
+def test_trims_overlap_between_adjacent_chunks():
+    packer = ContextPacker("test", default_budget=100)
+    packed, report = packer.pack([_chunk("one two three", 0, 0.9), _chunk("three four", 1, 0.8)])
+    assert [c["text"] for c in packed] == ["one two three", " four"]
+    assert report["used_tokens"] == len("one two three") + len(" four")
+
+
+def test_trimmed_multibyte_text_decodes_cleanly():
+    packer = ContextPacker("test", default_budget=100)
+    packed, _ = packer.pack([_chunk("café crème", 0, 0.9), _chunk("crème brûlée", 1, 0.8)])
+    assert packed[1]["text"] == " brûlée"
+    assert "�" not in "".join(c["text"] for c in packed)
+
+
+def test_clean_cut_widens_split_characters():
+    tokens = _BYTES.encode("aé")
+    assert _BYTES.decode_bytes(tokens[2:]) == b"\xa9"
+    assert _BYTES.decode(_clean_cut(_BYTES, tokens, 2, 3)) == "é"
+    assert _BYTES.decode(_clean_cut(_BYTES, tokens, 0, 2)) == "aé"
@@ -0,0 +1,75 @@
+import asyncio
+
+import fakeredis
+import numpy as np
+import pytest
+
+from runners import embedding_cache
+from runners.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        embedding_cache,
+        "get_async_redis",
+        lambda url, decode_responses=True, max_connections=None: fakeredis.FakeAsyncRedis(
+            server=server, decode_responses=decode_responses
+        ),
+    )
+    return server
+
+
+def _embedder():
+    calls: list[list[str]] = []
+
+    async def _embed(texts):
+        calls.append(list(texts))
+        return np.array([[float(len(t)), 1.0] for t in texts], dtype=np.float32)
+
+    return _embed, calls
+
+
+def _cache(tmp_path=None, max_items=100):
+    store_dir = tmp_path / "embeddings" if tmp_path is not None else None
+    return EmbeddingCache("m", "redis://test", max_items, ttl_seconds=60, store_dir=store_dir)
+
+
+def test_memory_and_redis_tiers(server):
+    embed, calls = _embedder()
+    first = _cache()
+    vectors = asyncio.run(first.embed(["a", "bb", "a"], embed))
+    assert vectors.tolist() == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+    assert calls == [["a", "bb"]]
+
+    asyncio.run(first.embed(["a"], embed))
+    assert first.stats()["memory_hits"] == 1
+
+    second = _cache()
+    asyncio.run(second.embed(["bb"], embed))
+    assert len(calls) == 1
+    assert second.stats()["redis_hits"] == 1
+
+
+def test_query_embeddings_skip_the_file_store(server, tmp_path):
+    embed, _ = _embedder()
+    cache = _cache(tmp_path)
+    asyncio.run(cache.embed(["query"], embed))
+    assert cache.stats()["stored"] == 0
+    assert len(asyncio.run(fakeredis.FakeAsyncRedis(server=server).keys("emb:*"))) == 1
+
+
+def test_build_embeddings_persist_to_the_file_store(server, tmp_path):
+    embed, calls = _embedder()
+    asyncio.run(_cache(tmp_path).embed(["chunk one", "chunk two"], embed, persist=True))
+    asyncio.run(fakeredis.FakeAsyncRedis(server=server).flushall())
+
+    reader = _cache(tmp_path)
+    vectors = asyncio.run(reader.embed(["chunk two"], embed))
+    assert vectors.tolist() == [[9.0, 1.0]]
+    assert len(calls) == 1
+    stats = reader.stats()
+    assert stats["stored"] == 2
+    assert stats["file_hits"] == 1
+    assert stats["redis_hits"] == 0
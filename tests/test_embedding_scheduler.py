@@ -0,0 +1,83 @@
+import asyncio
+
+import httpx
+import pytest
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+from runners import embedding_scheduler
+from runners.embedding_scheduler import EmbeddingScheduler, _parse_duration, _retry_delay
+
+_REQUEST = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+
+
+def _status_error(cls, status: int, headers: dict | None = None):
+    response = httpx.Response(status, headers=headers or {}, request=_REQUEST)
+    return cls("error", response=response, body=None)
+
+
+@pytest.fixture(autouse=True)
+def _no_sleep(monkeypatch):
+    slept: list[float] = []
+
+    async def _sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr(embedding_scheduler.asyncio, "sleep", _sleep)
+    return slept
+
+
+def _flaky(errors: list[Exception]):
+    calls: list[list[str]] = []
+
+    async def _request(texts):
+        calls.append(texts)
+        if errors:
+            raise errors.pop(0)
+        return "vectors", {}, 7
+
+    return _request, calls
+
+
+def test_parse_duration_and_retry_delay():
+    assert _parse_duration("1m30s") == 90.0
+    assert _parse_duration("250ms") == 0.25
+    assert _parse_duration("2.5") == 2.5
+    assert _parse_duration(None) is None
+    assert _retry_delay({"retry-after-ms": "1500"}) == 1.5
+    assert _retry_delay({"x-ratelimit-reset-tokens": "6s"}) == 6.0
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        APIConnectionError(request=_REQUEST),
+        APITimeoutError(request=_REQUEST),
+        _status_error(InternalServerError, 500),
+    ],
+)
+def test_transient_errors_are_retried_with_backoff(error, _no_sleep):
+    scheduler = EmbeddingScheduler(max_concurrency=2)
+    request, calls = _flaky([error, error])
+    assert asyncio.run(scheduler.run(["a", "b"], request)) == "vectors"
+    assert len(calls) == 3
+    assert len(_no_sleep) == 2 and _no_sleep[1] > _no_sleep[0]
+    stats = scheduler.stats()
+    assert stats["transient_errors"] == 2
+    assert stats["requests"] == 1 and stats["tokens"] == 7
+
+
+def test_rate_limit_honours_retry_after(_no_sleep):
+    scheduler = EmbeddingScheduler(max_concurrency=1)
+    request, calls = _flaky([_status_error(RateLimitError, 429, {"retry-after": "4"})])
+    assert asyncio.run(scheduler.run(["a"], request)) == "vectors"
+    assert len(calls) == 2
+    assert scheduler.stats()["rate_limited"] == 1
+    assert 4.0 <= _no_sleep[0] <= 5.0
+
+
+def test_gives_up_after_max_retries():
+    scheduler = EmbeddingScheduler(max_concurrency=1, max_retries=1)
+    request, calls = _flaky([APIConnectionError(request=_REQUEST)] * 2)
+    with pytest.raises(APIConnectionError):
+        asyncio.run(scheduler.run(["a"], request))
+    assert len(calls) == 2
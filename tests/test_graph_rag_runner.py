@@ -0,0 +1,125 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from runners import graph_rag_runner
+from runners.graph_rag_runner import GraphRagRunner, _query_param
+
+
+class _Vdb:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.single: list[str] = []
+
+    async def query_many(self, queries, top_k, embeddings=None):
+        if self.fail:
+            raise RuntimeError("vector store down")
+        return [[{"id": f"batch:{q}"}] for q in queries]
+
+    async def query(self, query, top_k=5):
+        self.single.append(query)
+        return [{"id": f"single:{query}"}]
+
+
+class _Rag:
+    def __init__(self, vdb: _Vdb, embed_fails: bool = False) -> None:
+        self.chunks_vdb = vdb
+        self.entities_vdb = vdb
+        self.embed_fails = embed_fails
+
+    async def embedding_func(self, texts):
+        if self.embed_fails:
+            raise RuntimeError("embedding outage")
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+def _runner() -> GraphRagRunner:
+    runner = GraphRagRunner.__new__(GraphRagRunner)
+    runner._semantic_cache = None
+
+    async def _aretrieve(rag, question, param, vdb=None):
+        if question == "broken":
+            raise ValueError("no contexts for broken")
+        hits = await (vdb or rag.chunks_vdb).query(question, param.top_k)
+        return [{"text": hit["id"], "meta": {}} for hit in hits]
+
+    async def _aanswer(rag, question, param, contexts):
+        return contexts[0]["text"]
+
+    runner._aretrieve = _aretrieve
+    runner._aanswer = _aanswer
+    runner._pack = lambda contexts, config=None: contexts
+    return runner
+
+
+def _batch(runner, rag, questions):
+    return asyncio.run(runner._abatch(rag, "a1", questions, 3, False, {}))
+
+
+def test_batch_uses_batched_vector_results():
+    vdb = _Vdb()
+    results = _batch(_runner(), _Rag(vdb), ["q1", "q2", "q1"])
+    assert [r["answer"] for r in results] == ["batch:q1", "batch:q2", "batch:q1"]
+    assert vdb.single == []
+
+
+def test_batch_falls_back_per_question_when_query_many_fails():
+    vdb = _Vdb(fail=True)
+    results = _batch(_runner(), _Rag(vdb), ["q1", "broken", "q2"])
+    assert [r["answer"] for r in results] == ["single:q1", None, "single:q2"]
+    assert results[1]["error"] == "no contexts for broken"
+    assert sorted(vdb.single) == ["q1", "q2"]
+
+
+def test_batch_falls_back_per_question_when_embedding_fails():
+    vdb = _Vdb()
+    results = _batch(_runner(), _Rag(vdb, embed_fails=True), ["q1"])
+    assert results[0]["answer"] == "single:q1"
+    assert results[0]["error"] is None
+
+
+def test_federated_skips_failed_shards_without_answer_cache(monkeypatch):
+    runner = _runner()
+    calls = []
+
+    async def _aretrieve_shard(rag, target, question, param, embedding):
+        if target["attempt_id"] == "bad":
+            raise RuntimeError("neo4j unavailable")
+        return [{"text": "hit", "score": 1.0, "meta": {"attempt_id": target["attempt_id"]}}]
+
+    def _make_model_func(model, client):
+        async def _complete(prompt, system_prompt=None, **kwargs):
+            calls.append(kwargs.get("hashing_kv"))
+            return "answer"
+
+        return _complete
+
+    runner._aretrieve_shard = _aretrieve_shard
+    runner._system_prompt = lambda param, contexts: "system"
+    monkeypatch.setattr(graph_rag_runner, "_make_model_func", _make_model_func)
+    runner._openai = None
+    targets = [{"corpus_id": "c1", "attempt_id": "good"}, {"corpus_id": "c2", "attempt_id": "bad"}]
+
+    answer, contexts, meta = asyncio.run(
+        runner._afederated([_Rag(_Vdb()), _Rag(_Vdb())], targets, "q", 3, _query_param(3, False))
+    )
+
+    assert answer == "answer"
+    assert [c["meta"]["attempt_id"] for c in contexts] == ["good"]
+    assert meta["failed_shards"] == [
+        {"corpus_id": "c2", "attempt_id": "bad", "error": "neo4j unavailable"}
+    ]
+    assert calls == [None]
+
+
+def test_federated_raises_when_every_shard_fails():
+    runner = _runner()
+
+    async def _aretrieve_shard(rag, target, question, param, embedding):
+        raise RuntimeError("down")
+
+    runner._aretrieve_shard = _aretrieve_shard
+    targets = [{"corpus_id": "c1", "attempt_id": "a1"}]
+    with pytest.raises(RuntimeError, match="All 1 corpora failed"):
+        asyncio.run(runner._afederated([_Rag(_Vdb())], targets, "q", 3, _query_param(3, False)))
@@ -0,0 +1,58 @@
+import asyncio
+
+import fakeredis
+
+from _storage import kv_redis
+from _storage.kv_cache import KVReadCache
+from _storage.kv_redis import RedisKVStorage
+
+
+def test_read_that_raced_a_write_is_not_cached():
+    cache = KVReadCache()
+    cache.configure({"ns": 10})
+    version = cache.version("a1")
+    cache.discard("a1", "ns", ["k"])
+    cache.put_many("a1", "ns", version, {"k": "old", "other": "value"})
+    assert cache.get_many("a1", "ns", ["k", "other"]) == {"other": "value"}
+
+    cache.put_many("a1", "ns", cache.version("a1"), {"k": "new"})
+    assert cache.get_many("a1", "ns", ["k"]) == {"k": "new"}
+
+
+def test_upsert_invalidates_after_the_write(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        kv_redis,
+        "get_async_redis",
+        lambda url, decode_responses=True, max_connections=None: fakeredis.FakeAsyncRedis(
+            server=server, decode_responses=decode_responses
+        ),
+    )
+    cache = KVReadCache()
+    monkeypatch.setattr(kv_redis, "get_kv_read_cache", lambda: cache)
+    storage = RedisKVStorage(
+        namespace="full_docs",
+        global_config={
+            "addon_params": {
+                "attempt_id": "a1",
+                "redis_url": "redis://test",
+                "kv_read_cache": {"full_docs": 10},
+            }
+        },
+    )
+
+    async def scenario():
+        await storage.upsert({"k": {"v": 1}})
+        assert await storage.get_by_id("k") == {"v": 1}
+        write = storage._write
+
+        async def _slow_write(batch):
+            # A read landing mid-write sees the old value but must not keep it cached.
+            assert await storage.get_by_id("k") == {"v": 1}
+            await write(batch)
+
+        storage._write = _slow_write
+        await storage.upsert({"k": {"v": 2}})
+        return await storage.get_by_id("k")
+
+    assert asyncio.run(scenario()) == {"v": 2}
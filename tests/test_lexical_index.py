@@ -0,0 +1,98 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from runners import graph_rag_runner
+from runners.graph_contexts import fuse_lexical_chunks
+from runners.graph_rag_runner import GraphRagRunner
+from runners.lexical_index import LexicalIndex, build_lexical_index, is_decisive
+
+_CHUNKS = {
+    "c1": "The red fox jumps over the lazy dog",
+    "c2": "A quick brown fox",
+    "c3": "Serial number XK-4411 appears only here",
+}
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = tmp_path / "lexical"
+    stats = build_lexical_index(_CHUNKS, path)
+    assert stats == {"path": str(path), "chunks": 3, "terms": 17}
+    return path
+
+
+def test_search_ranks_rare_terms_first(index_path):
+    index = LexicalIndex.load(index_path)
+    hits = index.search("xk 4411", 5)
+    assert [hit["id"] for hit in hits] == ["c3"]
+    assert hits[0]["matched_terms"] == hits[0]["query_terms"] == 2
+
+    hits = index.search("fox lazy", 5)
+    assert [hit["id"] for hit in hits] == ["c1", "c2"]
+    assert index.search("unknown words", 5) == []
+    assert len(index.search("fox", 1)) == 1
+
+
+def test_load_returns_none_without_index(tmp_path):
+    assert LexicalIndex.load(tmp_path / "missing") is None
+
+
+def test_is_decisive():
+    def hit(score, matched=2, terms=2):
+        return {"id": "x", "score": score, "matched_terms": matched, "query_terms": terms}
+
+    assert not is_decisive([], 2.0)
+    assert is_decisive([hit(1.0)], 2.0)
+    assert not is_decisive([hit(5.0, matched=1)], 2.0)
+    assert is_decisive([hit(4.0), hit(1.0)], 2.0)
+    assert not is_decisive([hit(3.0), hit(2.0)], 2.0)
+
+
+class _TextChunks:
+    async def get_by_ids(self, ids):
+        return [{"content": f"text {i}", "full_doc_id": "d", "chunk_order_index": 0} for i in ids]
+
+
+def _item(chunk_id, score, kind="chunk"):
+    return {"text": chunk_id, "score": score, "meta": {"type": kind, "id": chunk_id}}
+
+
+def test_fuse_lexical_chunks_uses_reciprocal_rank_fusion():
+    items = [_item("a", 0.9), _item("b", 0.5), _item("e1", 0.7, kind="entity")]
+    hits = [{"id": "b", "score": 7.0}, {"id": "c", "score": 3.0}]
+    fused = asyncio.run(fuse_lexical_chunks(items, hits, _TextChunks()))
+
+    by_id = {c["meta"]["id"]: c for c in fused}
+    assert by_id["b"]["score"] == pytest.approx(0.9)
+    assert by_id["a"]["score"] < by_id["b"]["score"]
+    assert by_id["c"]["text"] == "text c"
+    assert by_id["b"]["meta"]["bm25"] == 7.0
+    assert "bm25" not in by_id["a"]["meta"]
+    assert by_id["e1"]["score"] == 0.7
+
+
+def test_fuse_without_hits_returns_items_unchanged():
+    items = [_item("a", 0.9)]
+    assert asyncio.run(fuse_lexical_chunks(items, [], _TextChunks())) is items
+
+
+def test_runner_caches_lexical_index_on_the_rag(index_path, monkeypatch):
+    monkeypatch.setattr(graph_rag_runner.settings, "HYBRID_SEARCH_ENABLED", True)
+    runner = GraphRagRunner.__new__(GraphRagRunner)
+    rag = SimpleNamespace(working_dir=str(index_path.parent))
+    loads = []
+    load = LexicalIndex.load
+    monkeypatch.setattr(LexicalIndex, "load", lambda path: loads.append(path) or load(path))
+
+    async def scenario():
+        first, second = await asyncio.gather(runner._lexical_index(rag), runner._lexical_index(rag))
+        other = await runner._lexical_index(SimpleNamespace(working_dir=str(index_path.parent)))
+        return first, second, other
+
+    index, again, other = asyncio.run(scenario())
+    assert isinstance(index, LexicalIndex)
+    assert again is index
+    assert other is not index
+    assert len(loads) == 2
@@ -0,0 +1,85 @@
+from runners import rag_cache
+from runners.rag_cache import RagCache, config_hash
+
+
+class _Rag:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+
+def _cache(max_size: int = 2, idle_ttl: float = 0):
+    closed: list[str] = []
+    cache = RagCache(max_size, idle_ttl, close_func=lambda rag: closed.append(rag.name))
+    return cache, closed
+
+
+def test_acquire_reuses_entry():
+    cache, closed = _cache()
+    first = cache.acquire("a", lambda: _Rag("a"))
+    cache.release(first)
+    second = cache.acquire("a", lambda: _Rag("other"))
+    cache.release(second)
+    assert first is second
+    assert cache.stats()["hits"] == 1
+    assert closed == []
+
+
+def test_lru_eviction_closes_idle_entry():
+    cache, closed = _cache(max_size=2)
+    for key in ("a", "b", "c"):
+        with cache.lease(key, lambda key=key: _Rag(key)):
+            pass
+    assert closed == ["a"]
+    assert cache.stats()["size"] == 2
+
+
+def test_lru_eviction_defers_close_while_in_use():
+    cache, closed = _cache(max_size=1)
+    rag = cache.acquire("a", lambda: _Rag("a"))
+    with cache.lease("b", lambda: _Rag("b")):
+        pass
+    assert closed == []
+    assert cache.stats()["pending_close"] == 1
+    cache.release(rag)
+    assert closed == ["a"]
+    assert cache.stats()["pending_close"] == 0
+
+
+def test_idle_ttl_expiry_waits_for_release(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(rag_cache.time, "monotonic", lambda: now[0])
+    cache, closed = _cache(max_size=4, idle_ttl=10)
+    rag = cache.acquire("a", lambda: _Rag("a"))
+    now[0] += 60
+    with cache.lease("b", lambda: _Rag("b")):
+        pass
+    assert closed == []
+    cache.release(rag)
+    assert closed == ["a"]
+
+
+def test_evict_and_clear_respect_leases():
+    cache, closed = _cache(max_size=4)
+    held = cache.acquire("a", lambda: _Rag("a"))
+    with cache.lease("b", lambda: _Rag("b")):
+        pass
+    assert cache.evict(lambda key: True) == 2
+    assert closed == ["b"]
+    cache.release(held)
+    assert closed == ["b", "a"]
+
+
+def test_nested_leases_close_after_last_release():
+    cache, closed = _cache(max_size=1)
+    first = cache.acquire("a", lambda: _Rag("a"))
+    second = cache.acquire("a", lambda: _Rag("a"))
+    cache.clear()
+    cache.release(first)
+    assert closed == []
+    cache.release(second)
+    assert closed == ["a"]
+
+
+def test_config_hash_is_order_independent():
+    assert config_hash({"a": 1, "b": 2}) == config_hash({"b": 2, "a": 1})
+    assert config_hash(None) == config_hash({})
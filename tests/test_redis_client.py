@@ -0,0 +1,18 @@
+import asyncio
+
+from services.redis_client import close_async_redis, get_async_redis
+
+
+def test_get_async_redis_keeps_a_pool_per_max_connections():
+    async def scenario():
+        small = get_async_redis("redis://localhost:6379/0", max_connections=4)
+        again = get_async_redis("redis://localhost:6379/0", max_connections=4)
+        large = get_async_redis("redis://localhost:6379/0", max_connections=32)
+        limits = small.connection_pool.max_connections, large.connection_pool.max_connections
+        await close_async_redis()
+        return small is again, small is large, limits
+
+    same, shared, limits = asyncio.run(scenario())
+    assert same
+    assert not shared
+    assert limits == (4, 32)
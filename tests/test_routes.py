@@ -0,0 +1,265 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from _storage import shared_collection_name
+from api import routes_corpora, routes_query
+from api.deps import get_current_user
+from db.models import Attempt, Corpus
+from db.session import get_db
+from ingestion.locks import claim_corpus_delete, release_corpus_delete
+from runners.graph_rag_runner import _ClosingIterator
+
+_USER = SimpleNamespace(id="user-1")
+
+
+class _Runner:
+    async def retrieve_and_answer_batch(self, questions, **kwargs):
+        return [
+            {"question": q, "answer": None, "contexts": [], "error": "boom"}
+            if q == "bad"
+            else {"question": q, "answer": f"a:{q}", "contexts": [], "error": None}
+            for q in questions
+        ]
+
+    async def retrieve_and_stream_answer(self, question, **kwargs):
+        async def _tokens():
+            yield "hel"
+            yield "lo"
+
+        return [{"text": "ctx", "score": 1.0, "meta": {}}], _tokens()
+
+    async def retrieve_and_answer_federated(self, targets, question, top_k, expand_graph):
+        failed = [{"corpus_id": "c2", "attempt_id": "a2", "error": "down"}]
+        return "merged", [{"text": "ctx", "score": 1.0, "meta": {}}], {"failed_shards": failed}
+
+
+class _Query:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        return self._rows[0] if self._rows else None
+
+    def all(self):
+        return self._rows
+
+
+class _Db:
+    def __init__(self, corpus, attempts):
+        self._rows = {Corpus: [corpus] if corpus else [], Attempt: attempts}
+        self.commits = 0
+
+    def query(self, model):
+        return _Query(self._rows[model])
+
+    def commit(self):
+        self.commits += 1
+
+    def delete(self, row):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _attempt(attempt_id: str, status: str = "ready"):
+    return SimpleNamespace(
+        attempt_id=attempt_id, corpus_id="c1", runner_type="graph", status=status, config={}
+    )
+
+
+@pytest.fixture
+def db():
+    corpus = SimpleNamespace(corpus_id="c1", latest_success_attempt_id="a1")
+    return _Db(corpus, [_attempt("a1")])
+
+
+@pytest.fixture
+def client(monkeypatch, db):
+    app = FastAPI()
+    app.include_router(routes_corpora.router, prefix="/corpora")
+    app.include_router(routes_query.router, prefix="/corpora")
+    app.state.services = SimpleNamespace(runner=lambda runner_type: _Runner())
+    app.dependency_overrides[get_current_user] = lambda: _USER
+    app.dependency_overrides[get_db] = lambda: db
+    corpus, attempt = SimpleNamespace(corpus_id="c1"), _attempt("a1")
+    monkeypatch.setattr(routes_query, "_get_query_target", lambda *args: (corpus, attempt))
+    monkeypatch.setattr(
+        routes_query,
+        "_get_federated_targets",
+        lambda *args: [(corpus, attempt), (SimpleNamespace(corpus_id="c2"), _attempt("a2"))],
+    )
+    return TestClient(app)
+
+
+def test_batch_query_keeps_order_and_item_errors(client):
+    response = client.post("/corpora/c1/query:batch", json={"questions": ["q1", "bad", "q2"]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["question"] for r in results] == ["q1", "bad", "q2"]
+    assert [r["error"] for r in results] == [None, "boom", None]
+
+
+def test_batch_query_rejects_oversized_batch(client, monkeypatch):
+    monkeypatch.setattr(routes_query.settings, "QUERY_BATCH_MAX_QUESTIONS", 1)
+    response = client.post("/corpora/c1/query:batch", json={"questions": ["q1", "q2"]})
+    assert response.status_code == 400
+
+
+def test_stream_query_emits_contexts_tokens_and_done(client):
+    response = client.post("/corpora/c1/query:stream", json={"question": "q"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        line.removeprefix("event: ")
+        for line in response.text.splitlines()
+        if line.startswith("event: ")
+    ]
+    assert events == ["contexts", "token", "token", "done"]
+    assert '"text": "hel"' in response.text
+
+
+def test_federated_query_reports_failed_shards(client):
+    response = client.post("/corpora/query", json={"question": "q"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["answer"] == "merged"
+    assert body["meta"]["failed_shards"][0]["attempt_id"] == "a2"
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    scheduled = []
+
+    def _run(corpus_id, services):
+        scheduled.append(corpus_id)
+        release_corpus_delete(corpus_id)
+
+    monkeypatch.setattr(routes_corpora, "_run_delete_corpus", _run)
+    return scheduled
+
+
+def test_delete_returns_202_and_schedules_background_delete(client, db, scheduled):
+    response = client.delete("/corpora/c1")
+    assert response.status_code == 202
+    assert response.json() == {"ok": True, "status": "deleting"}
+    assert scheduled == ["c1"]
+    assert db.commits == 1
+    assert db.query(Attempt).first().status == "deleting"
+
+
+def test_delete_reschedules_stale_deleting_attempts(client, db, scheduled):
+    db.query(Attempt).first().status = "deleting"
+    assert client.delete("/corpora/c1").status_code == 202
+    assert scheduled == ["c1"]
+
+
+def test_delete_does_not_reschedule_while_running(client, db, scheduled):
+    assert claim_corpus_delete("c1")
+    try:
+        assert client.delete("/corpora/c1").status_code == 202
+    finally:
+        release_corpus_delete("c1")
+    assert scheduled == []
+    assert db.commits == 0
+
+
+def test_failed_background_delete_marks_attempts(db, monkeypatch):
+    logs = []
+
+    def _fail(db, corpus_id, services):
+        raise RuntimeError("neo4j unavailable")
+
+    monkeypatch.setattr(routes_corpora, "delete_corpus", _fail)
+    monkeypatch.setattr(routes_corpora, "SessionLocal", lambda: db)
+    monkeypatch.setattr(routes_corpora, "append_attempt_log", lambda *args: logs.append(args))
+    assert claim_corpus_delete("c1")
+    routes_corpora._run_delete_corpus("c1", services=None)
+
+    attempt = db.query(Attempt).first()
+    assert attempt.status == "delete_failed"
+    assert attempt.error == "neo4j unavailable"
+    assert logs == [("c1", "a1", "Delete failed: neo4j unavailable")]
+    assert db.commits == 1
+    assert claim_corpus_delete("c1")
+    release_corpus_delete("c1")
+
+
+def test_stream_disconnect_before_first_token_releases_resources(client, monkeypatch):
+    closed = []
+
+    async def _never():
+        await asyncio.Event().wait()
+        yield "unreachable"
+
+    async def _stream(self, question, **kwargs):
+        tokens = _ClosingIterator(_never(), lambda: closed.append("released"))
+        return [{"text": "ctx", "score": 1.0, "meta": {}}], tokens
+
+    monkeypatch.setattr(_Runner, "retrieve_and_stream_answer", _stream)
+    body = json.dumps({"question": "q"}).encode()
+    messages = [
+        {"type": "http.request", "body": body, "more_body": False},
+        {"type": "http.disconnect"},
+    ]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/corpora/c1/query:stream",
+        "raw_path": b"/corpora/c1/query:stream",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    asyncio.run(asyncio.wait_for(client.app(scope, receive, send), timeout=5))
+    assert closed == ["released"]
+    assert not any(b"event: token" in m.get("body", b"") for m in sent)
+
+
+def test_delete_corpus_derives_shared_collections_without_artifacts(db, monkeypatch):
+    attempt = db.query(Attempt).first()
+    attempt.artifacts = None
+    attempt.config = {"chroma_layout": "shared", "chroma_shards": 4, "embedding_model": "m"}
+    calls = []
+    services = SimpleNamespace(
+        chroma=SimpleNamespace(
+            delete_where=lambda name, where: calls.append((name, where)),
+            delete_collection=lambda name: calls.append((name, None)),
+        ),
+        neo4j=SimpleNamespace(delete_attempt=lambda *args, **kwargs: None),
+        redis=SimpleNamespace(delete_attempt_keys=lambda *args, **kwargs: 0),
+        runner=lambda runner_type: SimpleNamespace(evict_attempt=lambda attempt_id: 0),
+    )
+    monkeypatch.setattr("ingestion.delete_corpus.delete_corpus_folder", lambda corpus_id: None)
+
+    assert routes_corpora.delete_corpus(db, "c1", services)
+    assert calls == [
+        (shared_collection_name("col", "m", namespace, "a1", 4), {"attempt_id": "a1"})
+        for namespace in ("entities", "chunks")
+    ]
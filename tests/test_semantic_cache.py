@@ -0,0 +1,70 @@
+import asyncio
+
+import fakeredis
+import numpy as np
+
+from runners import semantic_cache
+from runners.semantic_cache import SemanticAnswerCache
+
+
+def _cache(monkeypatch, max_entries: int = 10):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        semantic_cache,
+        "get_async_redis",
+        lambda url, max_connections=None: fakeredis.FakeAsyncRedis(
+            server=server, decode_responses=True
+        ),
+    )
+    return SemanticAnswerCache("redis://test", threshold=0.9, max_entries=max_entries)
+
+
+def test_store_then_lookup_similar_question(monkeypatch):
+    cache = _cache(monkeypatch)
+
+    async def scenario():
+        await cache.store("a1", "local", 5, 6000, "q", np.array([1.0, 0.0]), "answer", [{"id": 1}])
+        hit = await cache.lookup("a1", "local", 5, 6000, np.array([0.99, 0.05]))
+        miss = await cache.lookup("a1", "local", 5, 6000, np.array([0.0, 1.0]))
+        other_attempt = await cache.lookup("a2", "local", 5, 6000, np.array([1.0, 0.0]))
+        return hit, miss, other_attempt
+
+    hit, miss, other_attempt = asyncio.run(scenario())
+    assert hit["answer"] == "answer"
+    assert hit["similarity"] > 0.9
+    assert miss is None
+    assert other_attempt is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_store_drops_oldest_entries(monkeypatch):
+    cache = _cache(monkeypatch, max_entries=1)
+
+    async def scenario():
+        await cache.store("a1", "naive", 5, 6000, "old", np.array([1.0, 0.0]), "old", [{"id": 1}])
+        await cache.store("a1", "naive", 5, 6000, "new", np.array([0.0, 1.0]), "new", [{"id": 2}])
+        cache.evict_attempt("a1")
+        return (
+            await cache.lookup("a1", "naive", 5, 6000, np.array([1.0, 0.0])),
+            await cache.lookup("a1", "naive", 5, 6000, np.array([0.0, 1.0])),
+        )
+
+    old, new = asyncio.run(scenario())
+    assert old is None
+    assert new["answer"] == "new"
+
+
+def test_token_budget_partitions_entries(monkeypatch):
+    cache = _cache(monkeypatch)
+
+    async def scenario():
+        await cache.store("a1", "local", 5, 6000, "q", np.array([1.0, 0.0]), "answer", [{"id": 1}])
+        same = await cache.lookup("a1", "local", 5, 6000, np.array([1.0, 0.0]))
+        smaller = await cache.lookup("a1", "local", 5, 2000, np.array([1.0, 0.0]))
+        await asyncio.to_thread(cache.evict_attempt, "a1")
+        return same, smaller
+
+    same, smaller = asyncio.run(scenario())
+    assert same["answer"] == "answer"
+    assert smaller is None
+    assert cache.stats()["partitions"] == 0
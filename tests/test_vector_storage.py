@@ -0,0 +1,151 @@
+import asyncio
+import zlib
+
+import numpy as np
+import pytest
+from nano_graphrag._utils import wrap_embedding_func_with_attrs
+
+from _storage import vdb_chroma, vdb_quantized
+from _storage.vdb_hnsw import HNSWVectorStorage
+from _storage.vdb_quantized import QuantizedVectorStorage, scan_l2
+
+_DIM = 8
+
+
+@wrap_embedding_func_with_attrs(embedding_dim=_DIM, max_token_size=8192)
+async def _embed(texts):
+    return np.stack(
+        [np.random.default_rng(zlib.crc32(text.encode())).normal(size=_DIM) for text in texts]
+    ).astype(np.float32)
+
+
+@pytest.fixture(autouse=True)
+def _word_tokens(monkeypatch):
+    monkeypatch.setattr(vdb_chroma, "encode_string_by_tiktoken", lambda text: text.split())
+
+
+def _storage(cls, tmp_path, namespace="chunks", **addon_params):
+    return cls(
+        namespace=namespace,
+        global_config={"working_dir": str(tmp_path), "addon_params": addon_params},
+        embedding_func=_embed,
+        meta_fields={"doc"},
+    )
+
+
+def _data(start: int, stop: int) -> dict[str, dict]:
+    return {f"k{i}": {"content": f"text number {i}", "doc": f"d{i}"} for i in range(start, stop)}
+
+
+def test_hnsw_grows_capacity_geometrically(tmp_path):
+    storage = _storage(HNSWVectorStorage, tmp_path)
+
+    async def scenario():
+        capacities = []
+        for start in range(0, 1500, 100):
+            await storage.upsert(_data(start, start + 100))
+            capacities.append(len(storage._vectors))
+        return capacities
+
+    capacities = asyncio.run(scenario())
+    assert len(set(capacities)) == 2
+    assert capacities[-1] >= 1500
+    assert len(storage._filled()) == 1500
+
+
+def test_hnsw_loads_lazily_and_survives_reload(tmp_path):
+    async def build():
+        storage = _storage(HNSWVectorStorage, tmp_path)
+        await storage.upsert(_data(0, 50))
+        await storage.index_done_callback()
+        return storage
+
+    asyncio.run(build())
+    reloaded = _storage(HNSWVectorStorage, tmp_path)
+    assert reloaded._ids == []
+
+    async def query():
+        hits = await reloaded.query("text number 7", top_k=3)
+        await reloaded.upsert(_data(50, 60))
+        return hits
+
+    hits = asyncio.run(query())
+    assert hits[0]["id"] == "k7"
+    assert hits[0]["doc"] == "d7"
+    assert len(reloaded._ids) == 60
+    assert np.array_equal(reloaded._filled()[7], asyncio.run(_embed(["text number 7"]))[0])
+
+
+def test_scan_l2_matches_brute_force_across_blocks(monkeypatch):
+    monkeypatch.setattr(vdb_quantized, "_SCAN_BLOCK_ROWS", 7)
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, _DIM)).astype(np.float32)
+    queries = rng.normal(size=(3, _DIM)).astype(np.float32)
+    ones = np.ones(len(vectors), dtype=np.float32)
+    labels, distances = scan_l2(queries, vectors, ones, (vectors * vectors).sum(axis=1), 5)
+
+    exact = ((queries[:, None, :] - vectors[None, :, :]) ** 2).sum(axis=2)
+    assert labels.tolist() == np.argsort(exact, axis=1)[:, :5].tolist()
+    assert np.allclose(distances, np.sort(exact, axis=1)[:, :5], atol=1e-4)
+    assert scan_l2(queries, vectors[:3], ones[:3], ones[:3], 5)[0].shape == (3, 3)
+
+
+def test_quantized_storage_keeps_data_across_repeated_saves(tmp_path):
+    async def build():
+        storage = _storage(QuantizedVectorStorage, tmp_path, vector_quantization="int8")
+        await storage.upsert(_data(0, 40))
+        await storage.index_done_callback()
+        await storage.index_done_callback()
+        await storage.upsert(_data(40, 45))
+        await storage.index_done_callback()
+
+    asyncio.run(build())
+    assert (tmp_path / "vectors" / "chunks" / "codes.bin").stat().st_size == 45 * _DIM
+
+    reloaded = _storage(QuantizedVectorStorage, tmp_path, vector_quantization="int8")
+    hits = asyncio.run(reloaded.query("text number 42", top_k=2))
+    assert hits[0]["id"] == "k42"
+
+
+class _Collection:
+    def __init__(self) -> None:
+        self.writes: list[int] = []
+
+    async def upsert(self, ids, documents, metadatas, embeddings):
+        self.writes.append(len(ids))
+
+
+class _ChromaClient:
+    def __init__(self) -> None:
+        self.batch_size_calls = 0
+        self.collections: dict[str, _Collection] = {}
+
+    async def get_max_batch_size(self):
+        self.batch_size_calls += 1
+        return 4
+
+    async def get_or_create_collection(self, name):
+        return self.collections.setdefault(name, _Collection())
+
+
+def test_chroma_storages_share_one_client_per_server(tmp_path, monkeypatch):
+    clients = []
+
+    async def _async_http_client(host, port):
+        clients.append(_ChromaClient())
+        return clients[-1]
+
+    monkeypatch.setattr(vdb_chroma.chromadb, "AsyncHttpClient", _async_http_client)
+    params = {"chroma_host": "chroma", "chroma_port": 8000, "attempt_id": "a1"}
+    chunks = _storage(vdb_chroma.ChromaVectorStorage, tmp_path, **params)
+    entities = _storage(vdb_chroma.ChromaVectorStorage, tmp_path, "entities", **params)
+
+    async def scenario():
+        await asyncio.gather(chunks.upsert(_data(0, 10)), entities.upsert(_data(0, 3)))
+        await chunks.upsert(_data(10, 12))
+
+    asyncio.run(scenario())
+    assert len(clients) == 1
+    assert clients[0].batch_size_calls == 1
+    assert sorted(clients[0].collections) == ["col__a1__chunks", "col__a1__entities"]
+    assert clients[0].collections["col__a1__chunks"].writes == [4, 4, 2, 2]